@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+"""
+Functions to mask chunks of coordinates on multiple processes.
+
+Only the coordinates of each chunk are sent to the worker processes, the
+records stay in the calling process.  The masked chunks are returned in the
+order of the input, while at most a few chunks per worker are in flight, hence
+memory usage stays bounded the same way it does in
+:mod:`geoanonymizer.streaming`.
+"""
+
+import collections
+import multiprocessing
+import os
+import time
+import numpy
+
+from geoanonymizer.spatial.batch.mask import limit_precision
+
+
+def _initialize_worker():
+    # Forked workers inherit the global numpy random state of their parent,
+    # hence they would all draw the same random numbers without reseeding.
+    numpy.random.seed()
+
+
+def _mask_coordinates(coordinates, mask, precisions, generator):
+    # masks like Pipeline.apply return the coordinates and the accepted ones
+    if generator is None:
+        result = mask(coordinates)
+    else:
+        result = mask(coordinates, generator=generator)
+    if isinstance(result, tuple):
+        coordinates, accepted = result
+    else:
+        coordinates, accepted = result, None
+    if precisions is not None:
+        coordinates = limit_precision(coordinates, precisions)
+    return coordinates, accepted
+
+
+def _masked_chunk(chunk, coordinates, accepted):
+    # the records of a chunk precede its coordinates
+    if accepted is None or accepted.all():
+        return chunk[:-1] + (coordinates,)
+    records = [record for record, keep in zip(chunk[-2], accepted.tolist())
+               if keep]
+    return chunk[:-2] + (records, coordinates[accepted])
+
+
+def _mask_chunk(task):
+    coordinates, mask, precisions, generator = task
+    started = time.time()
+    result = _mask_coordinates(coordinates, mask, precisions, generator)
+    return result, os.getpid(), time.time() - started
+
+
+class Throughput(object):
+    """
+    Contains the amount of chunks, records and seconds spent per worker
+    process, as recorded by :func:`.mask_in_parallel`.
+
+        >>> throughput = Throughput()
+        >>> throughput.record(1, 1000, 0.5)
+        >>> throughput.record(1, 1000, 0.5)
+        >>> throughput.record(2, 500, 0.5)
+        >>> throughput.workers[1]
+        (2, 2000, 1.0)
+
+        >>> throughput.per_worker()
+        {1: 2000.0, 2: 1000.0}
+
+        >>> throughput.records
+        2500
+    """
+
+    __slots__ = ("_workers",)
+
+    def __init__(self):
+        self._workers = {}
+
+    def record(self, worker, records, seconds):
+        """
+        Record that the `worker` masked the amount of `records` in `seconds`.
+        """
+        chunks, total, spent = self._workers.get(worker, (0, 0, 0.0))
+        self._workers[worker] = (chunks + 1, total + records, spent + seconds)
+
+    @property
+    def workers(self):
+        """
+        Tuples of `(chunks, records, seconds)` per worker.
+
+        :rtype: dict
+        """
+        return dict(self._workers)
+
+    @property
+    def records(self):
+        """
+        Total amount of records masked by all workers.
+
+        :rtype: int
+        """
+        return sum(records for _, records, _ in self._workers.values())
+
+    def per_worker(self):
+        """
+        Records masked per second and worker.
+
+        :rtype: dict
+        """
+        return dict(
+            (worker, records / seconds if seconds else float('inf'))
+            for worker, (_, records, seconds) in self._workers.items()
+        )
+
+    def __repr__(self):
+        return "Throughput(%r)" % (self._workers,)
+
+
+def mask_in_parallel(chunks, mask, precisions=None, generator=None,
+                     processes=None, throughput=None):
+    """
+    Apply the `mask` function to the coordinates of each chunk on a pool of
+    `processes` worker processes, defaulting to the amount of CPUs, and yield
+    the masked chunks in the order of the input.  This is the parallel
+    counterpart of :func:`geoanonymizer.streaming.mask_chunks`, hence the
+    `mask` must be picklable, ie. a module level function or a
+    :func:`functools.partial` of it.
+
+    If the `generator` is a :class:`geoanonymizer.randomstream.RandomStream`,
+    each chunk is masked with the substream of the chunk's index, hence the
+    result is the same, as when masking the chunks with
+    :func:`geoanonymizer.streaming.mask_chunks` on a single process.
+
+    If a :class:`.Throughput` instance is given, the work of each worker is
+    recorded in it.  Like :func:`geoanonymizer.streaming.mask_chunks`, the
+    records rejected by a `mask` returning the coordinates and the accepted
+    ones, ie. :meth:`geoanonymizer.spatial.batch.pipeline.Pipeline.apply`,
+    are dropped.
+    """
+    if generator is not None and not hasattr(generator, 'substream'):
+        raise TypeError(
+            "generator has an unsupported type: %r; use RandomStream" %
+            type(generator)
+        )
+
+    processes = processes or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes, _initialize_worker)
+    pending = collections.deque()
+
+    def _collect():
+        chunk, result = pending.popleft()
+        (coordinates, accepted), worker, seconds = result.get()
+        if throughput is not None:
+            throughput.record(worker, len(coordinates), seconds)
+        return _masked_chunk(chunk, coordinates, accepted)
+
+    try:
+        for index, chunk in enumerate(chunks):
+            task = (
+                chunk[-1],
+                mask,
+                precisions,
+                None if generator is None else generator.substream(index)
+            )
+            pending.append((chunk, pool.apply_async(_mask_chunk, (task,))))
+            if len(pending) >= 2 * processes:
+                yield _collect()
+        while pending:
+            yield _collect()
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+"""
+:class:`.RandomStream` represents a seedable and reproducible source of
+randomness, which can be split into independent substreams.
+"""
+
+import binascii
+import hashlib
+import numbers
+import random
+import numpy
+
+
+class RandomStream(random.Random):
+    """
+    Contains a random number generator, which can be used wherever the
+    functions in :mod:`geoanonymizer.spatial.mask` accept a `generator`, as
+    well as a :class:`numpy.random.Generator` for the functions in
+    :mod:`geoanonymizer.spatial.batch.mask`, both derived from the same seed.
+
+    Two streams with the same seed produce the same random numbers:
+
+        >>> RandomStream(1).random() == RandomStream(1).random()
+        True
+
+        >>> RandomStream(1).numpy.random() == RandomStream(1).numpy.random()
+        True
+
+    Each stream can be split into any number of independent, non-overlapping
+    substreams, ie. one per worker or one per chunk of data.  A substream
+    solely depends on the seed and the given index, hence the substream of a
+    chunk is always the same, no matter how many workers process the chunks
+    in which order:
+
+        >>> stream = RandomStream(1)
+        >>> substream = RandomStream(1).substream(3)
+        >>> stream.substream(3).random() == substream.random()
+        True
+
+        >>> stream.substream(3).random() == stream.substream(4).random()
+        False
+
+        >>> [substream.spawn_key for substream in stream.spawn(2)]
+        [(0,), (1,)]
+
+    Without a seed, the stream is seeded from the operating system's entropy
+    pool.  The `entropy` property holds the effectively used seed, so it can be
+    recorded to reproduce a run later on.
+    """
+
+    def __init__(self, seed=None, spawn_key=()):
+        self._spawn_key = tuple(spawn_key)
+        super(RandomStream, self).__init__(seed)
+
+    def seed(self, a=None, *args, **kwargs):
+        """
+        Seed both random number generators from the given integer `a`.
+        Strings and bytes are converted to an integer by their SHA-512 digest,
+        like :meth:`random.Random.seed` does:
+
+            >>> RandomStream('abc').random() == RandomStream(b'abc').random()
+            True
+
+        """
+        if isinstance(a, str) and not isinstance(a, bytes):
+            a = a.encode('utf-8')
+        if isinstance(a, (bytes, bytearray)):
+            a = int(binascii.hexlify(hashlib.sha512(a).digest()), 16)
+        elif a is not None and not isinstance(a, numbers.Integral):
+            raise TypeError(
+                "seed has an unsupported type: %r; use int, str or bytes" %
+                type(a))
+        self._sequence = numpy.random.SeedSequence(
+            a, spawn_key=self._spawn_key)
+        self._numpy = None
+
+        state = self._sequence.generate_state(4, numpy.uint64)
+        super(RandomStream, self).seed(
+            sum(int(word) << (64 * index) for index, word in enumerate(state))
+        )
+
+    @property
+    def entropy(self):
+        """
+        The seed of this stream or its root stream.
+
+        :rtype: int
+        """
+        return self._sequence.entropy
+
+    @property
+    def spawn_key(self):
+        """
+        The indices leading from the root stream to this stream.
+
+        :rtype: tuple
+        """
+        return self._spawn_key
+
+    @property
+    def numpy(self):
+        """
+        :class:`numpy.random.Generator` instance derived from the same seed.
+
+        :rtype: :class:`numpy.random.Generator`
+        """
+        if self._numpy is None:
+            self._numpy = numpy.random.Generator(
+                numpy.random.PCG64(self._sequence))
+        return self._numpy
+
+    def substream(self, index):
+        """
+        Create the independent substream with the given `index`.
+
+        :rtype: :class:`.RandomStream`
+        """
+        return RandomStream(self.entropy, self._spawn_key + (int(index),))
+
+    def spawn(self, count, start=0):
+        """
+        Create `count` independent substreams, beginning with index `start`.
+
+        :rtype: list of :class:`.RandomStream`
+        """
+        return [self.substream(index) for index in range(start, start + count)]
+
+    def getstate(self):
+        return (
+            super(RandomStream, self).getstate(),
+            None if self._numpy is None else self._numpy.bit_generator.state
+        )
+
+    def setstate(self, state):
+        super(RandomStream, self).setstate(state[0])
+        if state[1] is None:
+            # the numpy generator had not been used, hence it starts afresh
+            self._numpy = None
+        else:
+            self.numpy.bit_generator.state = state[1]
+
+    def __reduce__(self):
+        return (
+            self.__class__, (self.entropy, self._spawn_key), self.getstate()
+        )
+
+    def __repr__(self):
+        return "RandomStream(%s, %r)" % (self.entropy, self._spawn_key)
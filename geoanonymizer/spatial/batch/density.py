@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+"""
+:class:`.DensityGrid` represents a raster of values, ie. the population
+density, on a regular grid of latitudes and longitudes.
+"""
+
+import itertools
+
+import numpy
+
+
+class DensityGrid(object):
+    """
+    Contains a raster of values in rows from north to south and columns from
+    west to east, with the south-western corner at `south`/`west` and square
+    cells of `cellsize` degrees.  The raster is held as one compact array,
+    hence looking up the values of a whole batch of coordinates costs a few
+    array operations, ie. O(1) per point:
+
+        >>> grid = DensityGrid([[1000.0, 10.0],
+        ...                     [100.0, 1.0]], south=0.0, west=0.0,
+        ...                    cellsize=1.0)
+
+        >>> coordinates = numpy.array([[1.5, 0.5], [0.5, 1.5], [5.0, 5.0]])
+        >>> grid.lookup(coordinates).tolist()
+        [1000.0, 1.0, nan]
+
+    The density can be mapped to masking parameters once, ie. a stronger
+    displacement for sparse populated areas.  The values below the first
+    break are mapped to the first value, and so on:
+
+        >>> sigma = grid.classify([50.0, 500.0], [0.05, 0.01, 0.001])
+        >>> numpy.round(sigma.lookup(coordinates, default=0.05), 3).tolist()
+        [0.001, 0.05, 0.05]
+
+    The resulting per-point values can be passed to the functions in
+    :mod:`geoanonymizer.spatial.batch.mask`, which accept arrays holding one
+    parameter value per coordinate:
+
+        >>> from geoanonymizer.spatial.batch.mask import (
+        ...     circular_gaussian_displacement)
+        >>> masked = circular_gaussian_displacement(
+        ...     coordinates, mu=0.0, sigma=sigma.lookup(coordinates, 0.05))
+
+    """
+
+    __slots__ = ("_values", "_south", "_west", "_cellsize")
+
+    def __init__(self, values, south, west, cellsize, nodata=None,
+                 dtype=numpy.float32):
+        values = numpy.array(values, dtype=dtype)
+        if values.ndim != 2:
+            raise ValueError(
+                "values must have two dimensions, got %r" % (values.shape,))
+        if nodata is not None:
+            values[values == nodata] = numpy.nan
+        self._values = values
+        self._south = float(south)
+        self._west = float(west)
+        self._cellsize = float(cellsize)
+
+    @classmethod
+    def from_ascii_grid(cls, source, dtype=numpy.float32):
+        """
+        Load a raster from the ESRI ASCII grid `source`, a file object or a
+        path, with cells of WGS84 (EPSG 4326) latitude and longitude.
+
+            >>> import io
+            >>> source = io.StringIO(u'''ncols 2
+            ... nrows 2
+            ... xllcorner 10.0
+            ... yllcorner 50.0
+            ... cellsize 0.5
+            ... NODATA_value -9999
+            ... 1 2
+            ... 3 -9999
+            ... ''')
+            >>> DensityGrid.from_ascii_grid(source)
+            DensityGrid(2, 2, south=50.0, west=10.0, cellsize=0.5)
+
+        The header may be separated by tabs and may lack the NODATA_value,
+        and the `source` is read forward only, hence it need not be
+        seekable:
+
+            >>> source = io.StringIO(u'ncols\\t1\\nnrows\\t1\\n'
+            ...                      u'xllcenter\\t0.5\\nyllcenter\\t0.5\\n'
+            ...                      u'cellsize\\t1\\n7\\n')
+            >>> DensityGrid.from_ascii_grid(source).values.tolist()
+            [[7.0]]
+
+        :rtype: :class:`.DensityGrid`
+        """
+        if not hasattr(source, 'readline'):
+            with open(source) as stream:
+                return cls.from_ascii_grid(stream, dtype)
+
+        header, lines = {}, source
+        while len(header) < 6:
+            line = source.readline()
+            fields = line.split(None, 1)
+            if not fields or fields[0][0] in '-+.0123456789':
+                # header without NODATA_value, hence the first row is read
+                # already and passed on without seeking back
+                lines = itertools.chain([line], source)
+                break
+            header[fields[0].lower()] = float(fields[1])
+
+        cellsize = header['cellsize']
+        west = header.get('xllcorner', header.get('xllcenter', 0.0) -
+                          cellsize / 2)
+        south = header.get('yllcorner', header.get('yllcenter', 0.0) -
+                           cellsize / 2)
+        values = numpy.loadtxt(lines, dtype=dtype, ndmin=2)
+        return cls(values, south, west, cellsize,
+                   header.get('nodata_value'), dtype)
+
+    @property
+    def values(self):
+        """
+        The raster's values, rows from north to south.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._values
+
+    @property
+    def bounds(self):
+        """
+        The raster's bounds as `(minx, miny, maxx, maxy)`, ie. longitudes and
+        latitudes.
+
+        :rtype: tuple
+        """
+        rows, columns = self._values.shape
+        return (self._west, self._south,
+                self._west + columns * self._cellsize,
+                self._south + rows * self._cellsize)
+
+    def lookup(self, coordinates, default=numpy.nan):
+        """
+        Return the values of the cells containing the given `coordinates` of
+        latitude and longitude.  Coordinates outside the raster and cells
+        without data get the `default` value.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        coordinates = numpy.asarray(coordinates, dtype=numpy.float64)
+        rows, columns = self._values.shape
+
+        # beware that longitude is x and latitude is y, and rows go southward
+        north = self._south + rows * self._cellsize
+        east = self._west + columns * self._cellsize
+        row = numpy.floor((north - coordinates[:, 0]) / self._cellsize)
+        column = numpy.floor((coordinates[:, 1] - self._west) / self._cellsize)
+
+        # the southern and eastern borders belong to the outermost cells
+        row[coordinates[:, 0] == self._south] = rows - 1
+        column[coordinates[:, 1] == east] = columns - 1
+
+        inside = (0 <= row) & (row < rows) & (0 <= column) & (column < columns)
+        result = numpy.full(len(coordinates), default, dtype=numpy.float64)
+        result[inside] = self._values[row[inside].astype(numpy.intp),
+                                      column[inside].astype(numpy.intp)]
+        if not numpy.isnan(default):
+            result[numpy.isnan(result)] = default
+        return result
+
+    def classify(self, breaks, values, dtype=numpy.float32):
+        """
+        Create a raster with the same extent, mapping all values below the
+        first of the ascending `breaks` to the first of the given `values`,
+        the values between the first and second break to the second value,
+        and so on.  Hence there must be one value more than breaks.  Cells
+        without data remain without data.
+
+        :rtype: :class:`.DensityGrid`
+        """
+        values = numpy.asarray(values, dtype=dtype)
+        if len(values) != len(breaks) + 1:
+            raise ValueError("there must be one value more than breaks")
+
+        classified = values[numpy.digitize(self._values, breaks)]
+        classified[numpy.isnan(self._values)] = numpy.nan
+        return DensityGrid(classified, self._south, self._west,
+                           self._cellsize, dtype=dtype)
+
+    def __repr__(self):
+        return "DensityGrid(%d, %d, south=%r, west=%r, cellsize=%r)" % (
+            self._values.shape + (self._south, self._west, self._cellsize)
+        )
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+u"""
+Functions solving geodesic problems on the WGS84 ellipsoid for arrays of
+coordinates.
+
+    “Vincenty's formulae are two related iterative methods used in geodesy to
+    calculate the distance between two points on the surface of a spheroid
+    … The first (direct method) computes the location of a point that is a
+    given distance and azimuth (direction) from another point.”
+
+    -- from `Vincenty's formulae
+    <https://en.wikipedia.org/wiki/Vincenty%27s_formulae>`_
+"""
+
+import numpy
+
+# WGS84 (EPSG 4326) ellipsoid
+_a = 6378137.0
+_f = 1 / 298.257223563
+_b = (1 - _f) * _a
+
+
+def destination(latitude, longitude, bearing, distance, tolerance=1e-12,
+                iterations=100):
+    """
+    Return the latitudes and longitudes of the points reached by travelling
+    the given `distance` in metres along a geodesic, starting at the given
+    `latitude` and `longitude` with the initial `bearing` in degrees clockwise
+    from north.  All parameters may be arrays of the same shape, or scalars.
+
+        >>> latitude, longitude = destination(0.0, 0.0, 90.0, 111319.490793)
+        >>> round(float(latitude), 9), round(float(longitude), 9)
+        (0.0, 1.0)
+
+        >>> latitude, longitude = destination([52.0, -33.9], [13.4, 18.4],
+        ...                                   [45.0, 200.0], [1000.0, 5000.0])
+        >>> numpy.round(latitude, 6).tolist()
+        [52.006355, -33.942357]
+
+        >>> numpy.round(longitude, 6).tolist()
+        [13.410297, 18.381502]
+
+    The iteration stops, once the change of the angular distance on the
+    auxiliary sphere drops below `tolerance` for all points, or after the
+    given amount of `iterations`, since it converges within a few iterations
+    for all distances below half the circumference of the earth.
+    """
+    phi1 = numpy.radians(latitude)
+    alpha1 = numpy.radians(bearing)
+    distance = numpy.asarray(distance, dtype=numpy.float64)
+
+    sin_alpha1 = numpy.sin(alpha1)
+    cos_alpha1 = numpy.cos(alpha1)
+
+    tan_u1 = (1 - _f) * numpy.tan(phi1)
+    cos_u1 = 1 / numpy.sqrt(1 + tan_u1 * tan_u1)
+    sin_u1 = tan_u1 * cos_u1
+
+    sigma1 = numpy.arctan2(tan_u1, cos_alpha1)
+    sin_alpha = cos_u1 * sin_alpha1
+    cos_sq_alpha = 1 - sin_alpha * sin_alpha
+    u_sq = cos_sq_alpha * (_a * _a - _b * _b) / (_b * _b)
+    A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+
+    sigma0 = distance / (_b * A)
+    sigma = sigma0
+    for _ in range(iterations):
+        cos_2sigma_m = numpy.cos(2 * sigma1 + sigma)
+        sin_sigma = numpy.sin(sigma)
+        cos_sigma = numpy.cos(sigma)
+        delta_sigma = B * sin_sigma * (
+            cos_2sigma_m + B / 4 * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m * cos_2sigma_m) -
+                B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma * sin_sigma) *
+                (-3 + 4 * cos_2sigma_m * cos_2sigma_m)
+            )
+        )
+        previous, sigma = sigma, sigma0 + delta_sigma
+        if numpy.all(numpy.abs(sigma - previous) <= tolerance):
+            break
+
+    cos_2sigma_m = numpy.cos(2 * sigma1 + sigma)
+    sin_sigma = numpy.sin(sigma)
+    cos_sigma = numpy.cos(sigma)
+
+    x = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_alpha1
+    phi2 = numpy.arctan2(
+        sin_u1 * cos_sigma + cos_u1 * sin_sigma * cos_alpha1,
+        (1 - _f) * numpy.sqrt(sin_alpha * sin_alpha + x * x)
+    )
+    lambda_ = numpy.arctan2(
+        sin_sigma * sin_alpha1,
+        cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_alpha1
+    )
+    C = _f / 16 * cos_sq_alpha * (4 + _f * (4 - 3 * cos_sq_alpha))
+    L = lambda_ - (1 - C) * _f * sin_alpha * (
+        sigma + C * sin_sigma * (
+            cos_2sigma_m + C * cos_sigma * (
+                -1 + 2 * cos_2sigma_m * cos_2sigma_m)
+        )
+    )
+
+    longitude = numpy.asarray(longitude, dtype=numpy.float64)
+    longitude = (longitude + numpy.degrees(L) + 180) % 360 - 180
+
+    return numpy.degrees(phi2), longitude
@@ -0,0 +1,706 @@
+# -*- coding: utf-8 -*-
+
+u"""
+Functions to mask arrays of spatial coordinates.
+
+Each function mirrors its counterpart in :mod:`geoanonymizer.spatial.mask`,
+but masks a whole batch of coordinates at once.  Coordinates are given as an
+array-like of shape `(n, 3)` with the columns latitude, longitude and
+altitude, or of shape `(n, 2)` without altitude.  All random angles and radii
+are drawn with a single call per batch, and a new array is returned, hence
+the given coordinates remain untouched, unless told otherwise.
+
+The random draws follow the same distributions as the scalar functions, so
+the results are statistically identical, but not identical number by number.
+
+All functions accept an optional `out` array of the same shape as the given
+coordinates, to write the result into, instead of allocating a new array.
+Passing the given coordinates as `out` masks them in place.
+
+All functions drawing random numbers accept an optional `generator`, which
+defaults to the global :mod:`numpy.random` state.  Pass a
+:class:`numpy.random.Generator` or a
+:class:`geoanonymizer.randomstream.RandomStream` instance to get reproducible
+results, independent of other threads or processes.
+
+All functions displacing by a radius accept an optional `metric` flag, with
+the same meaning as in :mod:`geoanonymizer.spatial.mask`, and an optional
+`geodesic` flag.  If the latter is true, the radius is given in metres too,
+but the points are displaced along geodesics on the WGS84 ellipsoid, see
+:func:`geoanonymizer.spatial.batch.geodesic.destination`, instead of adding
+planar offsets to latitude and longitude.
+"""
+
+import math
+import numpy
+
+from geoanonymizer.spatial.batch.geodesic import destination
+from geoanonymizer.spatial.projection import (
+    _bands, _get_metres_per_degree_table)
+
+_degrees_per_metre_table = []
+_blocksize = 16384
+
+
+def _as_coordinates(coordinates, out=None):
+    if out is None:
+        coordinates = numpy.array(coordinates, dtype=numpy.float64)
+    else:
+        if out is not coordinates:
+            out[...] = coordinates
+        coordinates = out
+    if coordinates.ndim != 2 or coordinates.shape[1] not in (2, 3):
+        raise ValueError(
+            "coordinates must have a shape of (n, 2) or (n, 3), got %r" %
+            (coordinates.shape,)
+        )
+    return coordinates
+
+
+def _is_zero(radius):
+    return radius is None or (numpy.isscalar(radius) and radius == 0)
+
+
+def _numpy_generator(generator):
+    # Without a generator we fall back to the global numpy random state, the
+    # same way the scalar functions fall back to the global random module.
+    if generator is None:
+        return numpy.random
+    # ... and we unwrap geoanonymizer.randomstream.RandomStream instances
+    return getattr(generator, 'numpy', generator)
+
+
+def _random_angles_in_radians(generator, size):
+    # We simplfy the implementation by calculating directly in radians
+    angles = generator.random(size)
+    angles *= 2 * math.pi
+    return angles
+
+
+def _random_uniform(generator, low, high, size):
+    # Same as random.uniform, which accepts `high` to be lower than `low`
+    return low + (high - low) * generator.random(size)
+
+
+def _random_gauss(generator, mu, sigma, size):
+    # Same as random.gauss, which accepts negative values for `sigma`
+    return mu + sigma * generator.standard_normal(size)
+
+
+def _scale(coordinates, x, y, radius, metric=False):
+    if not metric:
+        x *= radius
+        y *= radius
+        return x, y
+
+    # The scalar table of geoanonymizer.spatial.projection is converted once
+    # into arrays of degrees per metre, so we look up all points at once.
+    if not _degrees_per_metre_table:
+        table = 1 / numpy.array(_get_metres_per_degree_table())
+        _degrees_per_metre_table.extend((table[:, 0].copy(),
+                                         table[:, 1].copy()))
+    latitude, longitude = _degrees_per_metre_table
+    if numpy.isscalar(radius):
+        # the radius is folded into the small tables, hence the degrees per
+        # metre replace the multiplication by the radius
+        latitude, longitude = latitude * radius, longitude * radius
+    else:
+        x *= radius
+        y *= radius
+
+    # The points are looked up in blocks, which keeps the band indices and
+    # the factors in the cache and reuses their buffers.
+    size = min(len(coordinates), _blocksize) or 1
+    bands = numpy.empty(size, dtype=numpy.intp)
+    factors = numpy.empty(size)
+    for start in range(0, len(coordinates), size):
+        stop = min(start + size, len(coordinates))
+        block = slice(0, stop - start)
+        # latitudes are positive after adding 90, hence truncation rounds
+        # here, and clipping gives latitudes beyond the poles the nearest
+        # pole's band
+        numpy.multiply(coordinates[start:stop, 0], _bands,
+                       out=factors[block])
+        numpy.add(factors[block], 90 * _bands + 0.5, out=bands[block],
+                  casting='unsafe')
+
+        # beware that longitude is x and latitude is y !
+        longitude.take(bands[block], out=factors[block], mode='clip')
+        x[start:stop] *= factors[block]
+        latitude.take(bands[block], out=factors[block], mode='clip')
+        y[start:stop] *= factors[block]
+    return x, y
+
+
+def _displace_along_geodesics(coordinates, x, y, z=0.0):
+    # beware that longitude is x and latitude is y, while the bearing is
+    # measured clockwise from north !
+    latitude, longitude = destination(
+        coordinates[:, 0],
+        coordinates[:, 1],
+        numpy.degrees(numpy.arctan2(x, y)),
+        numpy.hypot(x, y)
+    )
+    coordinates[:, 0] = latitude
+    coordinates[:, 1] = longitude
+    if coordinates.shape[1] == 3:
+        coordinates[:, 2] += z
+    return coordinates
+
+
+def _normalize(coordinates):
+    # Rotate the points around the globe, the same way geopy.point.Point does
+    latitude = coordinates[:, 0]
+    selected = numpy.abs(latitude) > 90
+    latitude[selected] = ((latitude[selected] + 90) % 180) - 90
+
+    longitude = coordinates[:, 1]
+    selected = numpy.abs(longitude) > 180
+    longitude[selected] = ((longitude[selected] + 180) % 360) - 180
+
+    return coordinates
+
+
+def _displace(coordinates, latitude, longitude, altitude=0.0):
+    coordinates[:, 0] += latitude
+    coordinates[:, 1] += longitude
+    if coordinates.shape[1] == 3:
+        coordinates[:, 2] += altitude
+    return _normalize(coordinates)
+
+
+def _displace_on_a_circle(coordinates, radius, generator, metric=False,
+                          geodesic=False):
+    a = _random_angles_in_radians(generator, len(coordinates))
+    x = numpy.cos(a)
+    y = numpy.sin(a, out=a)
+    x, y = _scale(coordinates, x, y, radius, metric and not geodesic)
+
+    if geodesic:
+        return _displace_along_geodesics(coordinates, x, y)
+
+    # beware that longitude is x and latitude is y !
+    return _displace(coordinates, y, x)
+
+
+def _displace_on_a_sphere(coordinates, radius, generator, metric=False,
+                          geodesic=False):
+    a1 = _random_angles_in_radians(generator, len(coordinates))
+    a2 = _random_angles_in_radians(generator, len(coordinates))
+    x = numpy.cos(a1)
+    y = numpy.sin(a1, out=a1)
+    sine = numpy.sin(a2)
+    x *= sine
+    y *= sine
+    x, y = _scale(coordinates, x, y, radius, metric and not geodesic)
+    z = numpy.cos(a2, out=a2)
+    z *= radius
+
+    if geodesic:
+        return _displace_along_geodesics(coordinates, x, y, z)
+
+    # beware that longitude is x and latitude is y !
+    return _displace(coordinates, y, x, z)
+
+
+# Veltkamp's constant, which splits a double into two halves of 26 bits
+_splitter = 2.0 ** 27 + 1
+
+
+def _round(values, precision, buffers):
+    # numpy.round scales the values by 10 ** precision and rounds the product,
+    # which, unlike round, rounds the product's error too.  Both agree unless
+    # the rounded product lies exactly halfway between two integers, hence
+    # there the sign of the product's error, computed exactly by Dekker's
+    # product, tells the direction.  The values are rounded in blocks of
+    # reused buffers, hence nothing is allocated per value.
+    scale = 10.0 ** precision
+    scale_high = scale * _splitter
+    scale_high -= scale_high - scale
+    scale_low = scale - scale_high
+    products, results, highs, lows, selected, halves, ties = buffers
+
+    for start in range(0, len(values), len(products)):
+        block = values[start:start + len(products)]
+        size = len(block)
+        product, result, tie = products[:size], results[:size], ties[:size]
+        numpy.multiply(block, scale, out=product)
+        numpy.rint(product, out=result)
+        numpy.subtract(product, result, out=highs[:size])
+        numpy.abs(highs[:size], out=highs[:size])
+        numpy.equal(highs[:size], 0.5, out=tie)
+        count = numpy.count_nonzero(tie)
+        if not count:
+            numpy.divide(result, scale, out=block)
+            continue
+
+        # the halves are gathered, and their values split into halves of 26
+        # bits, whose products with the halves of the scale are exact
+        value, half = selected[:count], halves[:count]
+        numpy.compress(tie, block, out=value)
+        numpy.compress(tie, product, out=half)
+        high, low, error = highs[:count], lows[:count], products[:count]
+        numpy.multiply(value, _splitter, out=high)
+        numpy.subtract(high, value, out=low)
+        high -= low
+        numpy.subtract(value, high, out=low)
+        numpy.multiply(high, scale_high, out=error)
+        error -= half
+        high *= scale_low
+        error += high
+        numpy.multiply(low, scale_high, out=high)
+        error += high
+        low *= scale_low
+        error += low
+
+        # the halves are moved a quarter towards their error, hence exact
+        # halves keep the even integer of numpy.rint
+        numpy.sign(error, out=error)
+        error *= 0.25
+        error += half
+        numpy.rint(error, out=error)
+        numpy.place(result, tie, error)
+        numpy.divide(result, scale, out=block)
+    return values
+
+
+def limit_precision(coordinates, precisions=(None, None, None), out=None):
+    """
+    Masked points have a limited precision, hence we cut decimal places.
+
+    This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.limit_precision`, with the same meaning
+    of the `precisions` tupel:
+
+        >>> coordinates = numpy.array([[12.3456, 12.3456, 123.456],
+        ...                            [65.4321, 65.4321, 654.321]])
+
+        >>> limit_precision(coordinates).tolist()
+        [[12.3456, 12.3456, 123.456], [65.4321, 65.4321, 654.321]]
+
+        >>> limit_precision(coordinates, (2, 2, 2)).tolist()
+        [[12.35, 12.35, 123.46], [65.43, 65.43, 654.32]]
+
+        >>> limit_precision(coordinates, (-1, -1, -1)).tolist()
+        [[10.0, 10.0, 120.0], [70.0, 70.0, 650.0]]
+
+        >>> limit_precision(coordinates, (-3, -3, -3)).tolist()
+        [[10.0, 10.0, 100.0], [70.0, 70.0, 700.0]]
+
+    Rounding to decimal places after the comma is done like
+    :func:`numpy.round`, except for values whose scaled product is rounded to
+    exactly halfway between two results, which are rounded towards their
+    exact product like :func:`round` and the scalar function do:
+
+        >>> limit_precision(numpy.array([[2.675, 1.005, 0.0]]),
+        ...                 (2, 2, None)).tolist()
+        [[2.67, 1.0, 0.0]]
+
+    All columns are rounded in place, hence passing the given coordinates as
+    `out` limits their precision without allocating any array of coordinates:
+
+        >>> limit_precision(coordinates, (-1, -1, -1), out=coordinates)
+        ... # doctest: +ELLIPSIS
+        array(...)
+
+        >>> coordinates.tolist()
+        [[10.0, 10.0, 120.0], [70.0, 70.0, 650.0]]
+
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    scratch = selected = buffers = None
+
+    for column in range(coordinates.shape[1]):
+        precision = precisions[column] or 0
+        values = coordinates[:, column]
+        if 0 < precision:
+            if buffers is None:
+                size = min(len(values), _blocksize) or 1
+                buffers = tuple(numpy.empty(size, dtype=numpy.float64)
+                                for _ in range(6)) + (
+                    numpy.empty(size, dtype=bool),)
+            _round(values, precision, buffers)
+        elif 0 > precision:
+            if scratch is None:
+                scratch = numpy.empty(len(values), dtype=numpy.float64)
+                selected = numpy.empty(len(values), dtype=bool)
+            # Decimals with less digits than the given absolute precision keep
+            # the last remaining digit intact, hence we try every precision,
+            # beginning with the coarsest one.  Values rounded already are
+            # multiples of the finer precisions, hence they remain unchanged.
+            for exponent in range(-1 * precision, 0, -1):
+                calculus = 10.0 ** exponent
+                numpy.greater(values, calculus, out=selected)
+                numpy.divide(values, calculus, out=scratch, where=selected)
+                numpy.rint(scratch, out=scratch, where=selected)
+                numpy.multiply(scratch, calculus, out=values, where=selected)
+
+    return coordinates
+
+
+def add_vector(coordinates, vector=(None, None, None), out=None):
+    """
+    Masked points are displaced by a fixed vector, hence we move the points.
+
+    This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.add_vector`:
+
+        >>> coordinates = numpy.array([[12.3456, 12.3456, 12.3456]])
+
+        >>> add_vector(coordinates).tolist()
+        [[12.3456, 12.3456, 12.3456]]
+
+        >>> add_vector(coordinates, (1.0, 1.0, 1.0)).tolist()
+        [[13.3456, 13.3456, 13.3456]]
+
+        >>> add_vector(coordinates, (-100.0, -100.0, -100.0)).tolist()
+        [[-87.6544, -87.6544, -87.6544]]
+
+    """
+    coordinates = _as_coordinates(coordinates, out)
+
+    return _displace(
+        coordinates,
+        vector[0] or 0.0,
+        vector[1] or 0.0,
+        vector[2] or 0.0
+    )
+
+
+def displace_on_a_circle(coordinates, radius=0.0, generator=None,
+                         metric=False,
+                         geodesic=False,
+                         out=None):
+    """
+    Masked points are placed on a random location on a circle around the
+    original locations.  This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.displace_on_a_circle`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> displace_on_a_circle(coordinates).tolist()
+        [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+
+        >>> displaced = displace_on_a_circle(coordinates, -1)
+        >>> numpy.allclose(numpy.hypot(displaced[:, 0], displaced[:, 1]), 1)
+        True
+
+        >>> displaced[:, 2].tolist()
+        [0.0, 0.0, 0.0]
+
+        >>> from geoanonymizer.randomstream import RandomStream
+        >>> numpy.array_equal(
+        ...     displace_on_a_circle(coordinates, 1, RandomStream(1)),
+        ...     displace_on_a_circle(coordinates, 1, RandomStream(1)))
+        True
+
+        >>> displaced = displace_on_a_circle(coordinates, 1, out=coordinates)
+        >>> displaced is coordinates
+        True
+
+        >>> displaced = displace_on_a_circle(
+        ...     numpy.full((3, 2), 60.0), 1000, metric=True)
+        >>> numpy.allclose(
+        ...     numpy.hypot((displaced[:, 0] - 60.0) * 111412.2,
+        ...                 (displaced[:, 1] - 60.0) * 55799.9), 1000)
+        True
+
+        >>> displaced = displace_on_a_circle(
+        ...     numpy.full((3, 2), 60.0), 1000, geodesic=True)
+        >>> from geopy.distance import distance
+        >>> [round(distance((60.0, 60.0), point).meters, 6)
+        ...  for point in displaced]
+        [1000.0, 1000.0, 1000.0]
+
+    The `radius` may be given as array, holding one radius per coordinate.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    if _is_zero(radius):
+        return coordinates
+    generator = _numpy_generator(generator)
+
+    return _displace_on_a_circle(coordinates, numpy.abs(radius), generator,
+                                 metric, geodesic)
+
+
+def displace_on_a_sphere(coordinates, radius=0.0, generator=None,
+                         metric=False,
+                         geodesic=False,
+                         out=None):
+    """
+    Masked points are placed on a random location on a sphere around the
+    original locations.  This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.displace_on_a_sphere`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> displace_on_a_sphere(coordinates).tolist()
+        [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+
+        >>> displaced = displace_on_a_sphere(coordinates, -1)
+        >>> numpy.allclose(numpy.linalg.norm(displaced, axis=1), 1)
+        True
+
+    The `radius` may be given as array, holding one radius per coordinate.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    if _is_zero(radius):
+        return coordinates
+    generator = _numpy_generator(generator)
+
+    return _displace_on_a_sphere(coordinates, numpy.abs(radius), generator,
+                                 metric, geodesic)
+
+
+def displace_within_a_circle(coordinates, radius=0.0, generator=None,
+                             metric=False,
+                             geodesic=False,
+                             out=None):
+    """
+    Masked locations are placed anywhere within a circular area around the
+    original locations.  This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.displace_within_a_circle`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> displace_within_a_circle(coordinates).tolist()
+        [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+
+        >>> displaced = displace_within_a_circle(coordinates, -1)
+        >>> bool(numpy.all(numpy.hypot(displaced[:, 0], displaced[:, 1]) <= 1))
+        True
+
+    The `radius` may be given as array, holding one radius per coordinate.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    if _is_zero(radius):
+        return coordinates
+    generator = _numpy_generator(generator)
+    size = len(coordinates)
+
+    radius = _random_uniform(generator, 0, numpy.abs(radius), size)
+
+    return _displace_on_a_circle(coordinates, radius, generator,
+                                 metric, geodesic)
+
+
+def displace_within_a_sphere(coordinates, radius=0.0, generator=None,
+                             metric=False,
+                             geodesic=False,
+                             out=None):
+    """
+    Masked locations are placed anywhere within a spherical space around the
+    original locations.  This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.displace_within_a_sphere`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> displace_within_a_sphere(coordinates).tolist()
+        [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+
+        >>> displaced = displace_within_a_sphere(coordinates, -1)
+        >>> bool(numpy.all(numpy.linalg.norm(displaced, axis=1) <= 1))
+        True
+
+    The `radius` may be given as array, holding one radius per coordinate.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    if _is_zero(radius):
+        return coordinates
+    generator = _numpy_generator(generator)
+    size = len(coordinates)
+
+    radius = _random_uniform(generator, 0, numpy.abs(radius), size)
+
+    return _displace_on_a_sphere(coordinates, radius, generator,
+                                 metric, geodesic)
+
+
+def displace_within_a_circular_donut(coordinates,
+                                     radius_inner=0.5,
+                                     radius_outer=1.0,
+                                     generator=None,
+                                     metric=False,
+                                     geodesic=False,
+                                     out=None):
+    """
+    Masked locations are placed anywhere within a circular donut around the
+    original locations.  This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.displace_within_a_circular_donut`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> displaced = displace_within_a_circular_donut(coordinates)
+        >>> distance = numpy.hypot(displaced[:, 0], displaced[:, 1])
+        >>> bool(numpy.all((0.5 <= distance) & (distance <= 1.0)))
+        True
+
+    The radii may be given as arrays, holding one radius per coordinate.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    generator = _numpy_generator(generator)
+    size = len(coordinates)
+
+    radius = _random_uniform(generator, radius_inner, radius_outer, size)
+
+    return _displace_on_a_circle(coordinates, numpy.abs(radius), generator,
+                                 metric, geodesic)
+
+
+def displace_within_a_spherical_donut(coordinates,
+                                      radius_inner=0.5,
+                                      radius_outer=1.0,
+                                      generator=None,
+                                      metric=False,
+                                      geodesic=False,
+                                      out=None):
+    """
+    Masked locations are placed anywhere within a spherical donut around the
+    original locations.  This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.displace_within_a_spherical_donut`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> displaced = displace_within_a_spherical_donut(coordinates)
+        >>> distance = numpy.linalg.norm(displaced, axis=1)
+        >>> bool(numpy.all((0.5 <= distance) & (distance <= 1.0)))
+        True
+
+    The radii may be given as arrays, holding one radius per coordinate.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    generator = _numpy_generator(generator)
+    size = len(coordinates)
+
+    radius = _random_uniform(generator, radius_inner, radius_outer, size)
+
+    return _displace_on_a_sphere(coordinates, numpy.abs(radius), generator,
+                                 metric, geodesic)
+
+
+def circular_gaussian_displacement(coordinates, mu=1.0, sigma=1.0,
+                                   generator=None,
+                                   metric=False,
+                                   geodesic=False,
+                                   out=None):
+    """
+    The direction of displacement is random, but the distance follows a
+    Gaussian distribution.  This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.circular_gaussian_displacement`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> circular_gaussian_displacement(coordinates).shape
+        (3, 3)
+
+    The parameters may be given as arrays, holding one value per coordinate,
+    ie. a `sigma` varying with the local population density, as looked up in
+    a :class:`geoanonymizer.spatial.batch.density.DensityGrid`.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    generator = _numpy_generator(generator)
+    size = len(coordinates)
+
+    radius = _random_gauss(generator, mu, sigma, size)
+
+    return _displace_on_a_circle(coordinates, numpy.abs(radius), generator,
+                                 metric, geodesic)
+
+
+def spherical_gaussian_displacement(coordinates, mu=1.0, sigma=1.0,
+                                    generator=None,
+                                    metric=False,
+                                    geodesic=False,
+                                    out=None):
+    """
+    The direction of displacement is random, but the distance follows a
+    Gaussian distribution.  This is the batch counterpart of
+    :func:`geoanonymizer.spatial.mask.spherical_gaussian_displacement`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> spherical_gaussian_displacement(coordinates).shape
+        (3, 3)
+
+    The parameters may be given as arrays, holding one value per coordinate,
+    ie. a `sigma` varying with the local population density, as looked up in
+    a :class:`geoanonymizer.spatial.batch.density.DensityGrid`.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    generator = _numpy_generator(generator)
+    size = len(coordinates)
+
+    radius = _random_gauss(generator, mu, sigma, size)
+
+    return _displace_on_a_sphere(coordinates, numpy.abs(radius), generator,
+                                 metric, geodesic)
+
+
+def circular_bimodal_gaussian_displacement(coordinates,
+                                           inner_mu=1.0,
+                                           inner_sigma=1.0,
+                                           outer_mu=2.0,
+                                           outer_sigma=1.0,
+                                           generator=None,
+                                           metric=False,
+                                           geodesic=False,
+                                           out=None):
+    """
+    This is a variation on the Gaussian masking technique, employing a bimodal
+    Gaussian distribution for the random distance function.  This is the batch
+    counterpart of
+    :func:`geoanonymizer.spatial.mask.circular_bimodal_gaussian_displacement`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> circular_bimodal_gaussian_displacement(coordinates).shape
+        (3, 3)
+
+    The parameters may be given as arrays, holding one value per coordinate.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    generator = _numpy_generator(generator)
+    size = len(coordinates)
+
+    inner_radius = _random_gauss(generator, inner_mu, inner_sigma, size)
+    outer_radius = _random_gauss(generator, outer_mu, outer_sigma, size)
+
+    radius = _random_uniform(generator, inner_radius, outer_radius, size)
+
+    return _displace_on_a_circle(coordinates, numpy.abs(radius), generator,
+                                 metric, geodesic)
+
+
+def spherical_bimodal_gaussian_displacement(coordinates,
+                                            inner_mu=1.0,
+                                            inner_sigma=1.0,
+                                            outer_mu=2.0,
+                                            outer_sigma=1.0,
+                                            generator=None,
+                                            metric=False,
+                                            geodesic=False,
+                                            out=None):
+    """
+    This is a variation on the Gaussian masking technique, employing a bimodal
+    Gaussian distribution for the random distance function.  This is the batch
+    counterpart of
+    :func:`geoanonymizer.spatial.mask.spherical_bimodal_gaussian_displacement`.
+
+        >>> coordinates = numpy.zeros((3, 3))
+
+        >>> spherical_bimodal_gaussian_displacement(coordinates).shape
+        (3, 3)
+
+    The parameters may be given as arrays, holding one value per coordinate.
+    """
+    coordinates = _as_coordinates(coordinates, out)
+    generator = _numpy_generator(generator)
+    size = len(coordinates)
+
+    inner_radius = _random_gauss(generator, inner_mu, inner_sigma, size)
+    outer_radius = _random_gauss(generator, outer_mu, outer_sigma, size)
+
+    radius = _random_uniform(generator, inner_radius, outer_radius, size)
+
+    return _displace_on_a_sphere(coordinates, numpy.abs(radius), generator,
+                                 metric, geodesic)
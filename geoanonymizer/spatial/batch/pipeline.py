@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""
+:class:`.Pipeline` represents a chain of masks, precision limits and filters,
+applied to a batch of coordinates in one pass.
+"""
+
+import numpy
+
+from geoanonymizer.spatial.batch.mask import _as_coordinates, limit_precision
+
+
+class Pipeline(object):
+    """
+    Contains a declared sequence of steps, each one applied in place to a
+    single buffer holding a copy of the given coordinates, hence no
+    intermediate arrays are allocated between the steps.  A pipeline is
+    immutable, each method declaring a step returns a new pipeline:
+
+        >>> from geoanonymizer.spatial.batch.mask import (
+        ...     displace_within_a_circular_donut)
+
+        >>> pipeline = Pipeline().mask(
+        ...     displace_within_a_circular_donut,
+        ...     radius_inner=0.5, radius_outer=1.0
+        ... ).limit_precision(
+        ...     (3, 3, None)
+        ... ).filter(
+        ...     lambda coordinates: coordinates[:, 0] >= 0.0
+        ... )
+
+        >>> pipeline
+        Pipeline(('mask', 'displace_within_a_circular_donut'), \
+('limit_precision', (3, 3, None)), ('filter', '<lambda>'))
+
+    Calling a pipeline returns the accepted coordinates only:
+
+        >>> coordinates = numpy.zeros((1000, 3))
+        >>> masked = pipeline(coordinates)
+        >>> bool(numpy.all(masked[:, 0] >= 0.0))
+        True
+
+    Hence a pipeline with filters returns fewer coordinates than given, and
+    must not be used as mask of records paired with their coordinates by
+    position.  Use :meth:`.apply` to get all coordinates and a boolean array
+    telling which ones have been accepted by the filters, ie. pass it as
+    `mask` to :mod:`geoanonymizer.streaming` or
+    :mod:`geoanonymizer.parallel`, which drop the rejected records.
+    """
+
+    __slots__ = ("_steps",)
+
+    def __init__(self, *steps):
+        self._steps = steps
+
+    @property
+    def steps(self):
+        """
+        Declared steps as tuples of `(kind, function or precisions, kwargs)`.
+
+        :rtype: tuple
+        """
+        return self._steps
+
+    def mask(self, function, **kwargs):
+        """
+        Declare a mask step, applying one of the functions in
+        :mod:`geoanonymizer.spatial.batch.mask` with the given `kwargs`.
+
+        :rtype: :class:`.Pipeline`
+        """
+        return Pipeline(*(self._steps + (('mask', function, kwargs),)))
+
+    def limit_precision(self, precisions):
+        """
+        Declare a step, limiting the precision to the given `precisions`, see
+        :func:`geoanonymizer.spatial.batch.mask.limit_precision`.
+
+        :rtype: :class:`.Pipeline`
+        """
+        return Pipeline(
+            *(self._steps + (('limit_precision', precisions, {}),)))
+
+    def filter(self, predicate):
+        """
+        Declare a filter step, rejecting all coordinates for which the given
+        `predicate` returns false.  The `predicate` gets the whole batch of
+        coordinates and must return a boolean array.
+
+        :rtype: :class:`.Pipeline`
+        """
+        return Pipeline(*(self._steps + (('filter', predicate, {}),)))
+
+    def apply(self, coordinates, generator=None, out=None):
+        """
+        Apply all steps to the given `coordinates` and return a tuple of the
+        masked coordinates and a boolean array of the accepted coordinates.
+        The `generator` is used by all mask steps, and `out` is the buffer to
+        use, which may be the given coordinates themselves.
+
+        :rtype: tuple
+        """
+        coordinates = _as_coordinates(coordinates, out)
+        accepted = numpy.ones(len(coordinates), dtype=bool)
+
+        for kind, step, kwargs in self._steps:
+            if kind == 'mask':
+                if generator is not None:
+                    kwargs = dict(kwargs, generator=generator)
+                step(coordinates, out=coordinates, **kwargs)
+            elif kind == 'limit_precision':
+                limit_precision(coordinates, step, out=coordinates)
+            elif kind == 'filter':
+                accepted &= step(coordinates)
+            else:
+                raise ValueError("step has an unsupported kind: %r" % kind)
+
+        return coordinates, accepted
+
+    def __call__(self, coordinates, generator=None, out=None):
+        coordinates, accepted = self.apply(coordinates, generator, out)
+        if accepted.all():
+            return coordinates
+        return coordinates[accepted]
+
+    def __repr__(self):
+        return "Pipeline(%s)" % ", ".join(
+            repr((kind, getattr(step, '__name__', step)))
+            for kind, step, _ in self._steps
+        )
@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+
+u"""
+Functions converting arrays of coordinates between geodesic projection
+systems, see :mod:`geoanonymizer.spatial.projection`.
+
+Web Mercator (EPSG 3857) distorts distances by the secant of the latitude,
+ie. by a factor of two at 60° latitude.  The metric projections of
+:class:`.TransverseMercator` (UTM) zones and of :class:`.LocalTangentPlane`
+(east-north-up) planes keep distances nearly undistorted, hence a batch can
+be projected, masked and tested against shapes in metres, and projected
+back.  Their transformers are cached per zone and reference, up to the 256
+least recently used ones, so there is no per-point setup.  Like the EPSG
+3857 functions, they write their results directly into the arrays `out`,
+if given:
+
+    >>> import numpy
+    >>> coordinates = numpy.array([[60.0, 25.0], [60.1, 25.1]])
+    >>> zone = utm(*utm_zone(60.0, 25.0))
+    >>> easting, northing = zone.forward(coordinates[:, 0], coordinates[:, 1])
+    >>> latitude, longitude = zone.inverse(easting + 100.0, northing)
+"""
+
+import collections
+import math
+import numpy
+
+from geoanonymizer.spatial.projection import _extent
+
+
+def _outputs(first, second, out):
+    if out is None:
+        return (numpy.empty(numpy.broadcast(first, second).shape),
+                numpy.empty(numpy.broadcast(first, second).shape))
+    if len(out) != 2:
+        raise ValueError("out must be a tuple of two arrays")
+    return out
+
+
+def convert_gps_to_map_coordinates(latitude, longitude, out=None):
+    """
+    Convert arrays of WGS84 (EPSG 4326) `latitude` and `longitude` to arrays
+    of Mercator (EPSG 3857) `x` and `y`, using the same formula as
+    :func:`geoanonymizer.spatial.projection.convert_gps_to_map_coordinates`.
+
+        >>> x, y = convert_gps_to_map_coordinates([45.0, -45.0], [90.0, -90.0])
+        >>> numpy.round(x, 1).tolist(), numpy.round(y, 1).tolist()
+        ([10018754.2, -10018754.2], [5621521.5, -5621521.5])
+
+    The results are written into `out`, a tuple of two arrays for `x` and
+    `y`, if given.  These may be the `longitude` and `latitude` arrays, ie.
+    the columns of a batch of coordinates, to convert in place:
+
+        >>> coordinates = numpy.array([[45.0, 90.0, 0.0]])
+        >>> _ = convert_gps_to_map_coordinates(
+        ...     coordinates[:, 0], coordinates[:, 1],
+        ...     out=(coordinates[:, 1], coordinates[:, 0]))
+        >>> numpy.round(coordinates, 1).tolist()
+        [[5621521.5, 10018754.2, 0.0]]
+
+    :rtype: tuple
+    """
+    latitude = numpy.asarray(latitude, dtype=numpy.float64)
+    longitude = numpy.asarray(longitude, dtype=numpy.float64)
+    x, y = _outputs(longitude, latitude, out)
+
+    numpy.add(latitude, 90, out=y)
+    numpy.multiply(y, math.pi / 360, out=y)
+    numpy.tan(y, out=y)
+    numpy.log(y, out=y)
+    numpy.divide(y, math.pi / 180, out=y)
+    numpy.multiply(y, _extent / 180, out=y)
+    numpy.multiply(longitude, _extent / 180, out=x)
+    return x, y
+
+
+def convert_map_to_gps_coordinates(x, y, out=None):
+    """
+    Convert arrays of Mercator (EPSG 3857) `x` and `y` to arrays of WGS84
+    (EPSG 4326) `latitude` and `longitude`, using the same formula as
+    :func:`geoanonymizer.spatial.projection.convert_map_to_gps_coordinates`.
+
+        >>> latitude, longitude = convert_map_to_gps_coordinates(
+        ...     [0.0, 10018754.17], [0.0, 5621521.485409545])
+        >>> numpy.round(latitude, 6).tolist()
+        [0.0, 45.0]
+
+        >>> numpy.round(longitude, 6).tolist()
+        [0.0, 90.0]
+
+    The results are written into `out`, a tuple of two arrays for `latitude`
+    and `longitude`, if given.  These may be the `y` and `x` arrays, to
+    convert in place.
+
+    :rtype: tuple
+    """
+    x = numpy.asarray(x, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+    latitude, longitude = _outputs(y, x, out)
+
+    numpy.multiply(x, 180 / _extent, out=longitude)
+    numpy.multiply(y, math.pi / _extent, out=latitude)
+    numpy.exp(latitude, out=latitude)
+    numpy.arctan(latitude, out=latitude)
+    numpy.multiply(latitude, 360 / math.pi, out=latitude)
+    numpy.subtract(latitude, 90, out=latitude)
+    return latitude, longitude
+
+
+# WGS84 (EPSG 4326) ellipsoid
+_a = 6378137.0
+_f = 1 / 298.257223563
+_e2 = _f * (2 - _f)
+_n = _f / (2 - _f)
+
+# the least recently used transformers are dropped beyond this amount
+_cache_size = 256
+_transformers = collections.OrderedDict()
+
+
+def _cached(key, factory, *args):
+    transformer = _transformers.pop(key, None)
+    if transformer is None:
+        transformer = factory(*args)
+    _transformers[key] = transformer
+    if len(_transformers) > _cache_size:
+        _transformers.popitem(last=False)
+    return transformer
+
+
+def _allocate(shape, count, out):
+    if out is None:
+        return tuple(numpy.empty(shape) for _ in range(count))
+    if len(out) != count:
+        raise ValueError("out must be a tuple of %d arrays" % count)
+    return out
+
+
+class TransverseMercator(object):
+    """
+    Contains the constants of a Universal Transverse Mercator (UTM) `zone`
+    on the northern or southern hemisphere, to convert arrays of WGS84
+    (EPSG 4326) coordinates to metric eastings and northings and back, by
+    the Krüger series to the third order of the ellipsoid's third
+    flattening, hence accurate to below a millimetre within the zone:
+
+        >>> zone = TransverseMercator(17)
+        >>> easting, northing = zone.forward(43.642567, -79.387139)
+        >>> round(float(easting)), round(float(northing))
+        (630084, 4833439)
+
+        >>> latitude, longitude = zone.inverse(easting, northing)
+        >>> round(float(latitude), 8), round(float(longitude), 8)
+        (43.642567, -79.387139)
+
+    Use :func:`.utm` to get the cached transformer of a zone.
+    """
+
+    __slots__ = ("_zone", "_north", "_meridian")
+
+    # scale on the central meridian, false easting and northing
+    _k0 = 0.9996
+    _false_easting = 500000.0
+    _false_northing = 10000000.0
+
+    # radius of the rectifying sphere times the scale
+    _scale = _k0 * _a / (1 + _n) * (1 + _n ** 2 / 4 + _n ** 4 / 64)
+
+    _alpha = (_n / 2 - 2 * _n ** 2 / 3 + 5 * _n ** 3 / 16,
+              13 * _n ** 2 / 48 - 3 * _n ** 3 / 5,
+              61 * _n ** 3 / 240)
+    _beta = (_n / 2 - 2 * _n ** 2 / 3 + 37 * _n ** 3 / 96,
+             _n ** 2 / 48 + _n ** 3 / 15,
+             17 * _n ** 3 / 480)
+
+    def __init__(self, zone, north=True):
+        if not 1 <= zone <= 60:
+            raise ValueError("zone must be within 1 and 60, got %r" % zone)
+        self._zone = zone
+        self._north = bool(north)
+        self._meridian = math.radians(zone * 6 - 183)
+
+    @property
+    def zone(self):
+        """
+        The zone's number.
+
+        :rtype: int
+        """
+        return self._zone
+
+    @property
+    def north(self):
+        """
+        True for the northern hemisphere, False for the southern one.
+
+        :rtype: bool
+        """
+        return self._north
+
+    def forward(self, latitude, longitude, out=None):
+        """
+        Convert arrays of `latitude` and `longitude` to arrays of easting and
+        northing in metres, written into the tuple of arrays `out` if given.
+
+        :rtype: tuple
+        """
+        phi = numpy.radians(latitude)
+        lambda_ = numpy.radians(longitude) - self._meridian
+        factor = 2 * math.sqrt(_n) / (1 + _n)
+
+        sin_phi = numpy.sin(phi)
+        t = numpy.sinh(numpy.arctanh(sin_phi) -
+                       factor * numpy.arctanh(factor * sin_phi))
+        xi = numpy.arctan2(t, numpy.cos(lambda_))
+        eta = numpy.arctanh(numpy.sin(lambda_) / numpy.sqrt(1 + t * t))
+
+        easting, northing = _allocate(eta.shape, 2, out)
+        numpy.copyto(easting, eta)
+        numpy.copyto(northing, xi)
+        for j, alpha in enumerate(self._alpha, 1):
+            easting += alpha * numpy.cos(2 * j * xi) * numpy.sinh(2 * j * eta)
+            northing += alpha * numpy.sin(2 * j * xi) * numpy.cosh(2 * j * eta)
+
+        easting *= self._scale
+        easting += self._false_easting
+        northing *= self._scale
+        if not self._north:
+            northing += self._false_northing
+        return easting, northing
+
+    def inverse(self, easting, northing, out=None, iterations=10):
+        """
+        Convert arrays of `easting` and `northing` in metres to arrays of
+        latitude and longitude, written into the tuple of arrays `out` if
+        given.  The latitude is found by a few `iterations`.
+
+        :rtype: tuple
+        """
+        northing = numpy.asarray(northing, dtype=numpy.float64)
+        if not self._north:
+            northing = northing - self._false_northing
+        xi = northing / self._scale
+        eta = (numpy.asarray(easting, dtype=numpy.float64) -
+               self._false_easting) / self._scale
+
+        xi_, eta_ = xi.copy(), eta.copy()
+        for j, beta in enumerate(self._beta, 1):
+            xi_ -= beta * numpy.sin(2 * j * xi) * numpy.cosh(2 * j * eta)
+            eta_ -= beta * numpy.cos(2 * j * xi) * numpy.sinh(2 * j * eta)
+
+        # the latitude's isometric latitude equals the conformal one's, which
+        # is solved by a fixed-point iteration converging by e² per step
+        psi = numpy.arctanh(numpy.sin(xi_) / numpy.cosh(eta_))
+        phi = numpy.arcsin(numpy.tanh(psi))
+        factor = 2 * math.sqrt(_n) / (1 + _n)
+        for _ in range(iterations):
+            previous = phi
+            phi = numpy.arcsin(numpy.tanh(
+                psi + factor * numpy.arctanh(factor * numpy.sin(phi))))
+            if numpy.all(numpy.abs(phi - previous) <= 1e-15):
+                break
+        lambda_ = numpy.arctan2(numpy.sinh(eta_), numpy.cos(xi_))
+
+        latitude, longitude = _allocate(phi.shape, 2, out)
+        numpy.degrees(phi, out=latitude)
+        numpy.add(lambda_, self._meridian, out=longitude)
+        numpy.degrees(longitude, out=longitude)
+        longitude += 180
+        numpy.mod(longitude, 360, out=longitude)
+        longitude -= 180
+        return latitude, longitude
+
+    def __repr__(self):
+        return "TransverseMercator(%d, north=%r)" % (self._zone, self._north)
+
+
+def utm_zone(latitude, longitude):
+    """
+    Return the UTM zone's number and hemisphere of the given `latitude` and
+    `longitude`, without the exceptions around Norway and Svalbard.
+
+        >>> utm_zone(43.642567, -79.387139)
+        (17, True)
+
+    :rtype: tuple
+    """
+    zone = int((longitude + 180) // 6) % 60 + 1
+    return zone, latitude >= 0
+
+
+def utm(zone, north=True):
+    """
+    Return the cached :class:`.TransverseMercator` transformer of the given
+    UTM `zone` and hemisphere.
+
+        >>> utm(17) is utm(17)
+        True
+
+    :rtype: :class:`.TransverseMercator`
+    """
+    return _cached(('utm', zone, bool(north)), TransverseMercator, zone, north)
+
+
+class LocalTangentPlane(object):
+    """
+    Contains the rotation of the east-north-up (ENU) plane touching the WGS84
+    ellipsoid at the reference `latitude`, `longitude` and `altitude`, to
+    convert arrays of coordinates to metric easts, norths and ups relative to
+    the reference and back, via earth-centred earth-fixed (ECEF) coordinates.
+    Hence distances are nearly undistorted close to the reference:
+
+        >>> plane = LocalTangentPlane(52.0, 13.0)
+        >>> east, north, up = plane.forward([52.0, 52.001], [13.001, 13.0])
+        >>> numpy.round(numpy.hypot(east, north), 2).tolist()
+        [68.68, 111.27]
+
+        >>> latitude, longitude, altitude = plane.inverse(east, north, up)
+        >>> numpy.round(latitude, 9).tolist()
+        [52.0, 52.001]
+
+    Use :func:`.local_tangent_plane` to get the cached transformer of a
+    reference.
+    """
+
+    __slots__ = ("_reference", "_origin", "_rotation")
+
+    def __init__(self, latitude, longitude, altitude=0.0):
+        self._reference = (latitude, longitude, altitude)
+        self._origin = numpy.array(
+            self._to_ecef(latitude, longitude, altitude)).reshape(3)
+
+        phi, lambda_ = math.radians(latitude), math.radians(longitude)
+        sin_phi, cos_phi = math.sin(phi), math.cos(phi)
+        sin_lambda, cos_lambda = math.sin(lambda_), math.cos(lambda_)
+        # rows are the east, north and up unit vectors in ECEF
+        self._rotation = numpy.array([
+            [-sin_lambda, cos_lambda, 0.0],
+            [-sin_phi * cos_lambda, -sin_phi * sin_lambda, cos_phi],
+            [cos_phi * cos_lambda, cos_phi * sin_lambda, sin_phi],
+        ])
+
+    @staticmethod
+    def _to_ecef(latitude, longitude, altitude):
+        phi, lambda_ = numpy.radians(latitude), numpy.radians(longitude)
+        sin_phi, cos_phi = numpy.sin(phi), numpy.cos(phi)
+        radius = _a / numpy.sqrt(1 - _e2 * sin_phi * sin_phi)
+        return ((radius + altitude) * cos_phi * numpy.cos(lambda_),
+                (radius + altitude) * cos_phi * numpy.sin(lambda_),
+                (radius * (1 - _e2) + altitude) * sin_phi)
+
+    @property
+    def reference(self):
+        """
+        The reference as `(latitude, longitude, altitude)`.
+
+        :rtype: tuple
+        """
+        return self._reference
+
+    def forward(self, latitude, longitude, altitude=0.0, out=None):
+        """
+        Convert arrays of `latitude`, `longitude` and `altitude` to arrays of
+        east, north and up in metres, written into the tuple of arrays `out`
+        if given.
+
+        :rtype: tuple
+        """
+        x, y, z = self._to_ecef(latitude, longitude, altitude)
+        x = x - self._origin[0]
+        y = y - self._origin[1]
+        z = z - self._origin[2]
+        results = _allocate(numpy.broadcast(x, y, z).shape, 3, out)
+        for (first, second, third), result in zip(self._rotation, results):
+            numpy.multiply(x, first, out=result)
+            result += second * y
+            result += third * z
+        return results
+
+    def inverse(self, east, north, up=0.0, out=None, iterations=10):
+        """
+        Convert arrays of `east`, `north` and `up` in metres to arrays of
+        latitude, longitude and altitude, written into the tuple of arrays
+        `out` if given.  The latitude is found by a few `iterations`.
+
+        :rtype: tuple
+        """
+        east = numpy.asarray(east, dtype=numpy.float64)
+        north = numpy.asarray(north, dtype=numpy.float64)
+        up = numpy.asarray(up, dtype=numpy.float64)
+        (e1, e2, e3), (n1, n2, n3), (u1, u2, u3) = self._rotation
+        x = e1 * east + n1 * north + u1 * up + self._origin[0]
+        y = e2 * east + n2 * north + u2 * up + self._origin[1]
+        z = e3 * east + n3 * north + u3 * up + self._origin[2]
+
+        p = numpy.hypot(x, y)
+        phi = numpy.arctan2(z, p * (1 - _e2))
+        for _ in range(iterations):
+            sin_phi = numpy.sin(phi)
+            radius = _a / numpy.sqrt(1 - _e2 * sin_phi * sin_phi)
+            height = p / numpy.cos(phi) - radius
+            previous = phi
+            phi = numpy.arctan2(
+                z, p * (1 - _e2 * radius / (radius + height)))
+            if numpy.all(numpy.abs(phi - previous) <= 1e-15):
+                break
+
+        sin_phi = numpy.sin(phi)
+        radius = _a / numpy.sqrt(1 - _e2 * sin_phi * sin_phi)
+        latitude, longitude, altitude = _allocate(phi.shape, 3, out)
+        numpy.divide(p, numpy.cos(phi), out=altitude)
+        altitude -= radius
+        numpy.degrees(phi, out=latitude)
+        numpy.arctan2(y, x, out=longitude)
+        numpy.degrees(longitude, out=longitude)
+        return latitude, longitude, altitude
+
+    def __repr__(self):
+        return "LocalTangentPlane(%r, %r, %r)" % self._reference
+
+
+def local_tangent_plane(latitude, longitude, altitude=0.0):
+    """
+    Return the cached :class:`.LocalTangentPlane` transformer of the given
+    reference `latitude`, `longitude` and `altitude`.
+
+        >>> local_tangent_plane(52.0, 13.0) is local_tangent_plane(52.0, 13.0)
+        True
+
+    :rtype: :class:`.LocalTangentPlane`
+    """
+    return _cached(('enu', latitude, longitude, altitude), LocalTangentPlane,
+                   latitude, longitude, altitude)
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""
+Functions dealing with shapes for arrays of coordinates, see
+:mod:`geoanonymizer.spatial.shape`.
+
+The coordinates are given as arrays of `x` and `y` values, hence longitudes
+and latitudes, ie. `coordinates[:, 1]` and `coordinates[:, 0]` of a batch
+used by :mod:`geoanonymizer.spatial.batch.mask`.
+"""
+
+import numpy
+
+from geoanonymizer.spatial.shape import (
+    BOUNDARY, INSIDE, OUTSIDE, GridPolygon, MultiPolygon, PreparedPolygon,
+    _edges
+)
+
+
+def _classify_multipolygon(x, y, polygon):
+    result = numpy.full(x.shape, OUTSIDE, dtype=numpy.int8)
+    for exterior, holes in polygon.parts:
+        part = classify(x, y, exterior)
+        for hole in holes:
+            inner = classify(x, y, hole)
+            part[(inner == BOUNDARY) & (part != OUTSIDE)] = BOUNDARY
+            part[inner == INSIDE] = OUTSIDE
+        numpy.maximum(result, part, out=result)
+    return result
+
+
+def _classify_ring(x, y, vertices):
+    # Classify the single x/y coordinate relative to the ring of the given
+    # array of vertices, looping over its edges by numpy, with the same rules
+    # as geoanonymizer.spatial.shape._winding_number.
+    ax, ay = vertices[:, 0], vertices[:, 1]
+    bx, by = numpy.roll(ax, -1), numpy.roll(ay, -1)
+    on_line = ay == y
+    if numpy.any(on_line & (ax == x)) or numpy.any(
+            on_line & (by == y) & (numpy.minimum(ax, bx) <= x) &
+            (x <= numpy.maximum(ax, bx))):
+        return BOUNDARY
+
+    cross = (bx - ax) * (y - ay) - (x - ax) * (by - ay)
+    upward = (ay <= y) & (y < by)
+    downward = (by <= y) & (y < ay)
+    if numpy.any((upward | downward) & (cross == 0)):
+        return BOUNDARY
+    winding = (numpy.count_nonzero(upward & (cross > 0)) -
+               numpy.count_nonzero(downward & (cross < 0)))
+    return INSIDE if winding else OUTSIDE
+
+
+def classify(x, y, polygon, bounds=None):
+    """
+    Classify the given `x`/`y` coordinates as
+    :data:`geoanonymizer.spatial.shape.INSIDE`, on the
+    :data:`geoanonymizer.spatial.shape.BOUNDARY` or
+    :data:`geoanonymizer.spatial.shape.OUTSIDE` of the given `polygon`, a
+    tuple of vertices, a :class:`geoanonymizer.spatial.shape.PreparedPolygon`,
+    a :class:`geoanonymizer.spatial.shape.GridPolygon` or a
+    :class:`geoanonymizer.spatial.shape.MultiPolygon`.  The `bounds` can be
+    given as `(minx, miny, maxx, maxy)`.
+
+        >>> polygon = ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0))
+        >>> classify([0.5, 0.0, 1.0, 2.0], [0.5, 0.5, 1.0, 0.0], polygon)
+        array([2, 1, 1, 0], dtype=int8)
+
+    The result is the same as the one of
+    :func:`geoanonymizer.spatial.shape.classify` for each coordinate.  The
+    loop runs over the edges of the polygon, each one tested against the
+    coordinates at its height only, which are found by a binary search on the
+    coordinates sorted by `y` once.
+
+    Beware:
+        - latitude is `y` and longitude is `x`
+        - coordinates and `polygon` must use the same geodesic projection
+          system
+    """
+    x = numpy.asarray(x, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+    if isinstance(polygon, MultiPolygon):
+        return _classify_multipolygon(x, y, polygon)
+    result = numpy.full(x.shape, OUTSIDE, dtype=numpy.int8)
+
+    if isinstance(polygon, GridPolygon):
+        polygon = polygon._prepared
+    if isinstance(polygon, PreparedPolygon):
+        bounds = polygon.bounds if bounds is None else bounds
+        edges = polygon._edges
+    else:
+        edges = tuple(_edges(polygon))
+    if bounds is None:
+        bounds = (min(edge[0] for edge in edges),
+                  min(edge[1] for edge in edges),
+                  max(edge[0] for edge in edges),
+                  max(edge[1] for edge in edges))
+
+    minx, miny, maxx, maxy = bounds
+    candidates = numpy.flatnonzero(
+        (minx <= x) & (x <= maxx) & (miny <= y) & (y <= maxy))
+    if not len(candidates):
+        return result
+
+    order = numpy.argsort(y.ravel()[candidates], kind='stable')
+    candidates = candidates[order]
+    xs = x.ravel()[candidates]
+    ys = y.ravel()[candidates]
+    winding = numpy.zeros(len(candidates), dtype=numpy.intp)
+    boundary = numpy.zeros(len(candidates), dtype=bool)
+
+    for ax, ay, bx, by, dx, dy in edges:
+        # coordinates at the height of the edge's first vertex, which may be
+        # the vertex itself, or on the edge if it is horizontal
+        lo, hi = ys.searchsorted(ay, 'left'), ys.searchsorted(ay, 'right')
+        if lo < hi:
+            if by == ay:
+                boundary[lo:hi] |= (
+                    (min(ax, bx) <= xs[lo:hi]) & (xs[lo:hi] <= max(ax, bx)))
+            else:
+                boundary[lo:hi] |= xs[lo:hi] == ax
+
+        if ay == by:
+            continue
+
+        # coordinates within the half-open height range of the edge, the sign
+        # of the cross product tells on which side of the edge they are
+        lo, hi = ys.searchsorted((min(ay, by), max(ay, by)))
+        if lo == hi:
+            continue
+        cross = dx * (ys[lo:hi] - ay) - (xs[lo:hi] - ax) * dy
+        boundary[lo:hi] |= cross == 0
+        if ay < by:
+            winding[lo:hi] += cross > 0
+        else:
+            winding[lo:hi] -= cross < 0
+
+    classes = numpy.where(winding != 0, INSIDE, OUTSIDE).astype(numpy.int8)
+    classes[boundary] = BOUNDARY
+    result.ravel()[candidates] = classes
+    return result
+
+
+def is_on_polygon(x, y, polygon, bounds=None):
+    """
+    Check if the given `x`/`y` coordinates are on the given `polygon`, see
+    :func:`.classify`, and return a boolean array.  The `bounds` can be
+    given as `(minx, miny, maxx, maxy)`.
+
+        >>> polygon = ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0))
+        >>> x = numpy.array([0.0, 0.0, 0.5, 0.5, 1.0, 0.5, 1.0, 2.0, 0.0, -1])
+        >>> y = numpy.array([0.0, 0.5, 0.0, 0.5, 0.5, 1.0, 1.0, 0.0, 2.0, -1])
+        >>> is_on_polygon(x, y, polygon).tolist()
+        [True, True, True, True, True, True, True, False, False, False]
+
+    This is the same as :func:`geoanonymizer.spatial.shape.is_on_polygon`
+    for each coordinate, hence it can be used to filter a whole batch of
+    masked coordinates, ie. in a
+    :class:`geoanonymizer.spatial.batch.pipeline.Pipeline`:
+
+        >>> from geoanonymizer.spatial.batch.pipeline import Pipeline
+        >>> pipeline = Pipeline().filter(
+        ...     lambda coordinates: is_on_polygon(
+        ...         coordinates[:, 1], coordinates[:, 0], polygon))
+
+    Beware:
+        - latitude is `y` and longitude is `x`
+        - coordinates and `polygon` must use the same geodesic projection
+          system
+    """
+    return classify(x, y, polygon, bounds) != OUTSIDE
+
+
+def locate(x, y, index):
+    """
+    Return the indices of the polygons of the given
+    :class:`geoanonymizer.spatial.index.PolygonIndex` containing the given
+    `x`/`y` coordinates, or -1 for coordinates on none of them.
+
+        >>> from geoanonymizer.spatial.index import PolygonIndex
+        >>> index = PolygonIndex([
+        ...     ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)),
+        ...     ((1.0, 0.0), (2.0, 0.0), (2.0, 1.0), (1.0, 1.0))])
+        >>> locate([0.5, 1.5, 1.0, 3.0], [0.5, 0.5, 0.5, 0.5], index)
+        array([ 0,  1,  0, -1])
+
+    This is the same as
+    :meth:`geoanonymizer.spatial.index.PolygonIndex.locate` for each
+    coordinate.  The coordinates descend the R-tree of the index together,
+    each node keeping those within its bounds, hence the exact test runs on
+    the candidate coordinates of each polygon only.
+
+    Beware:
+        - latitude is `y` and longitude is `x`
+        - coordinates and polygons must use the same geodesic projection
+          system
+    """
+    x = numpy.asarray(x, dtype=numpy.float64).ravel()
+    y = numpy.asarray(y, dtype=numpy.float64).ravel()
+    result = numpy.full(len(x), -1, dtype=numpy.intp)
+    if index.tree.root is None:
+        return result
+
+    stack = [(index.tree.root, numpy.arange(len(x)))]
+    while stack:
+        (minx, miny, maxx, maxy, leaf, children), selected = stack.pop()
+        xs, ys = x[selected], y[selected]
+        selected = selected[
+            (minx <= xs) & (xs <= maxx) & (miny <= ys) & (ys <= maxy)]
+        if not len(selected):
+            continue
+        if not leaf:
+            stack.extend((child, selected) for child in children)
+            continue
+
+        for minx, miny, maxx, maxy, item in children:
+            # coordinates located in polygons of lower index already are done
+            candidates = selected[(result[selected] < 0) |
+                                  (result[selected] > item)]
+            xs, ys = x[candidates], y[candidates]
+            candidates = candidates[
+                (minx <= xs) & (xs <= maxx) & (miny <= ys) & (ys <= maxy)]
+            if len(candidates):
+                on = is_on_polygon(x[candidates], y[candidates],
+                                   index[item], (minx, miny, maxx, maxy))
+                result[candidates[on]] = item
+
+    return result
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+
+"""
+:class:`.PolygonStore` represents polygons in a compact binary file, which is
+opened by memory mapping.
+
+The file holds little-endian 64 bit values, all aligned to 8 bytes:
+
+    - the magic bytes `GEOPOLY1`
+    - the amounts of polygons, parts, rings and vertices
+    - the bounds of each polygon as `(minx, miny, maxx, maxy)`
+    - the offsets of the parts of each polygon, of the rings of each part and
+      of the vertices of each ring, the first ring of a part being its
+      exterior ring and the others its holes
+    - the vertices as `(x, y)`
+
+Hence opening a store reads the header only, and worker processes share the
+pages of the file instead of each one holding its own copy of the polygons.
+"""
+
+import collections
+
+import numpy
+
+from geoanonymizer.spatial.batch.shape import _classify_ring
+from geoanonymizer.spatial.index import PolygonIndex
+from geoanonymizer.spatial.shape import (
+    INSIDE, OUTSIDE, GridPolygon, MultiPolygon, PreparedPolygon
+)
+
+_magic = b'GEOPOLY1'
+
+
+def _parts(polygon):
+    if isinstance(polygon, MultiPolygon):
+        return [(exterior.polygon, [hole.polygon for hole in holes])
+                for exterior, holes in polygon.parts]
+    if isinstance(polygon, (PreparedPolygon, GridPolygon)):
+        return [(polygon.polygon, [])]
+    return [(polygon, [])]
+
+
+def write_polygons(target, polygons):
+    """
+    Write the given `polygons`, given as tuples of vertices or polygons of
+    :mod:`geoanonymizer.spatial.shape`, into the `target` file, a path or a
+    binary file object, see :class:`.PolygonStore`.
+    """
+    if not hasattr(target, 'write'):
+        with open(target, 'wb') as stream:
+            return write_polygons(stream, polygons)
+
+    bounds, polygon_parts, part_rings, ring_vertices = [], [0], [0], [0]
+    vertices = []
+    for polygon in polygons:
+        parts = _parts(polygon)
+        for exterior, holes in parts:
+            for ring in [exterior] + list(holes):
+                vertices.extend((vertex[0], vertex[1]) for vertex in ring)
+                ring_vertices.append(len(vertices))
+            part_rings.append(len(ring_vertices) - 1)
+        polygon_parts.append(len(part_rings) - 1)
+        xs = [vertex[0] for exterior, _ in parts for vertex in exterior]
+        ys = [vertex[1] for exterior, _ in parts for vertex in exterior]
+        bounds.append((min(xs), min(ys), max(xs), max(ys)))
+
+    target.write(_magic)
+    header = (len(bounds), len(part_rings) - 1, len(ring_vertices) - 1,
+              len(vertices))
+    for values, dtype in (
+            (header, '<u8'), (bounds, '<f8'), (polygon_parts, '<u8'),
+            (part_rings, '<u8'), (ring_vertices, '<u8'), (vertices, '<f8')):
+        target.write(numpy.asarray(values, dtype=dtype).tobytes())
+
+
+class PolygonStore(object):
+    """
+    Contains the polygons of the file at `path`, as written by
+    :func:`.write_polygons`, mapped into memory.  The bounds of all polygons
+    are available right away, a polygon is created from the file when
+    accessed the first time only:
+
+        >>> import os, tempfile
+        >>> land = ((0.0, 0.0), (3.0, 0.0), (3.0, 3.0), (0.0, 3.0))
+        >>> lake = ((1.0, 1.0), (2.0, 1.0), (2.0, 2.0), (1.0, 2.0))
+        >>> island = ((4.0, 0.0), (5.0, 0.0), (5.0, 1.0), (4.0, 1.0))
+
+        >>> path = os.path.join(tempfile.mkdtemp(), 'polygons.bin')
+        >>> write_polygons(path, [MultiPolygon([(land, [lake])]), island])
+
+        >>> store = PolygonStore(path)
+        >>> store.bounds.tolist()
+        [[0.0, 0.0, 3.0, 3.0], [4.0, 0.0, 5.0, 1.0]]
+
+        >>> store[1]
+        PreparedPolygon(((4.0, 0.0), (5.0, 0.0), (5.0, 1.0), (4.0, 1.0)))
+
+    Rings with more than `grid` vertices are created as
+    :class:`geoanonymizer.spatial.shape.GridPolygon`.  The created polygons
+    are cached for up to `cache_size` polygons, negative indices sharing the
+    entries of their positive ones:
+
+        >>> store[-1] is store[1]
+        True
+
+    Coordinates are classified right on the mapped vertices, without
+    creating any polygon, and so does the :meth:`.index` of a store:
+
+        >>> store.classify(0, 1.5, 1.5), store.classify(0, 2.0, 1.5)
+        (0, 1)
+
+        >>> index = store.index()
+        >>> index.locate(1.5, 1.5) is None, index.locate(4.5, 0.5)
+        (True, 1)
+
+    A store is pickled by its path, hence sending it to worker processes
+    sends the path only.
+    """
+
+    __slots__ = ("_path", "_grid", "_data", "_bounds", "_polygon_parts",
+                 "_part_rings", "_ring_vertices", "_vertices", "_polygons",
+                 "_cache_size")
+
+    def __init__(self, path, grid=None, cache_size=256):
+        self._path = path
+        self._grid = grid
+        self._data = data = numpy.memmap(path, dtype=numpy.uint8, mode='r')
+        if bytes(data[:8]) != _magic:
+            raise ValueError("%r is not a polygon store" % (path,))
+
+        polygons, parts, rings, vertices = data[8:40].view('<u8').tolist()
+        views = []
+        offset = 40
+        for length, dtype in ((4 * polygons, '<f8'), (polygons + 1, '<u8'),
+                              (parts + 1, '<u8'), (rings + 1, '<u8'),
+                              (2 * vertices, '<f8')):
+            views.append(data[offset:offset + 8 * length].view(dtype))
+            offset += 8 * length
+
+        self._bounds = views[0].reshape(polygons, 4)
+        self._polygon_parts = views[1]
+        self._part_rings = views[2]
+        self._ring_vertices = views[3]
+        self._vertices = views[4].reshape(vertices, 2)
+        self._polygons = collections.OrderedDict()
+        self._cache_size = cache_size
+
+    @property
+    def path(self):
+        """
+        The path of the file.
+
+        :rtype: str
+        """
+        return self._path
+
+    @property
+    def bounds(self):
+        """
+        The bounds of all polygons as array of `(minx, miny, maxx, maxy)`.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._bounds
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def _normalize(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("polygon index out of range")
+        return index % len(self)
+
+    def _ring(self, index):
+        start, stop = self._ring_vertices[index:index + 2]
+        ring = tuple(map(tuple, self._vertices[start:stop].tolist()))
+        if self._grid is not None and len(ring) > self._grid:
+            return GridPolygon(ring)
+        return PreparedPolygon(ring)
+
+    def __getitem__(self, index):
+        """
+        Return the polygon of the given `index` as
+        :class:`geoanonymizer.spatial.shape.MultiPolygon`, or as prepared
+        polygon if it has a single ring.
+        """
+        index = self._normalize(index)
+        polygon = self._polygons.pop(index, None)
+        if polygon is None:
+            first, last = self._polygon_parts[index:index + 2]
+            parts = []
+            for part in range(first, last):
+                start, stop = self._part_rings[part:part + 2]
+                rings = [self._ring(ring) for ring in range(start, stop)]
+                parts.append((rings[0], rings[1:]))
+
+            if len(parts) == 1 and not parts[0][1]:
+                polygon = parts[0][0]
+            else:
+                polygon = MultiPolygon(parts)
+
+        self._polygons[index] = polygon
+        if len(self._polygons) > self._cache_size:
+            self._polygons.popitem(last=False)
+        return polygon
+
+    def _classify_ring(self, index, x, y):
+        start, stop = self._ring_vertices[index:index + 2]
+        return _classify_ring(x, y, self._vertices[start:stop])
+
+    def classify(self, index, x, y):
+        """
+        Classify the given `x`/`y` coordinate as
+        :data:`geoanonymizer.spatial.shape.INSIDE`, on the
+        :data:`geoanonymizer.spatial.shape.BOUNDARY` or
+        :data:`geoanonymizer.spatial.shape.OUTSIDE` of the polygon of the
+        given `index`, like its
+        :meth:`geoanonymizer.spatial.shape.MultiPolygon.classify` does, but
+        on the mapped vertices.
+
+        :rtype: int
+        """
+        index = self._normalize(index)
+        minx, miny, maxx, maxy = self._bounds[index].tolist()
+        if not (minx <= x <= maxx and miny <= y <= maxy):
+            return OUTSIDE
+
+        result = OUTSIDE
+        first, last = self._polygon_parts[index:index + 2]
+        for part in range(first, last):
+            start, stop = self._part_rings[part:part + 2]
+            classes = self._classify_ring(start, x, y)
+            if classes == OUTSIDE:
+                continue
+            for hole in range(start + 1, stop):
+                inner = self._classify_ring(hole, x, y)
+                if inner == INSIDE:
+                    classes = OUTSIDE
+                    break
+                if inner != OUTSIDE:
+                    classes = inner
+            if classes == INSIDE:
+                return INSIDE
+            result = max(result, classes)
+        return result
+
+    def contains(self, index, x, y):
+        """
+        Check if the given `x`/`y` coordinate is on the polygon of the given
+        `index`, see :meth:`.classify`.
+
+        :rtype: bool
+        """
+        return self.classify(index, x, y) != OUTSIDE
+
+    def index(self, capacity=16):
+        """
+        Create a :class:`geoanonymizer.spatial.index.PolygonIndex` of the
+        polygons from the stored bounds, which classifies coordinates on the
+        mapped vertices, see :meth:`.classify`.
+
+        :rtype: :class:`geoanonymizer.spatial.index.PolygonIndex`
+        """
+        return PolygonIndex(_StoredPolygons(self), capacity,
+                            bounds=self._bounds.tolist())
+
+    def __reduce__(self):
+        return PolygonStore, (self._path, self._grid, self._cache_size)
+
+    def __repr__(self):
+        return "PolygonStore(%r)" % (self._path,)
+
+
+class _StoredPolygons(object):
+    # The polygons of a store as seen by its index, each one testing
+    # coordinates on the mapped vertices instead of being created.
+
+    __slots__ = ("_store",)
+
+    def __init__(self, store):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, index):
+        return _StoredPolygon(self._store, index)
+
+
+class _StoredPolygon(object):
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def classify(self, x, y):
+        return self._store.classify(self._index, x, y)
+
+    def contains(self, x, y):
+        return self._store.contains(self._index, x, y)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""
+:class:`.Coordinate` represents a lightweight geodesic point.
+"""
+
+from geopy.point import Point
+from operator import itemgetter
+
+
+class Coordinate(tuple):
+    """
+    Contains a geodesic point as plain tuple of (latitude<float>,
+    longitude<float>, altitude<float>), hence it is a lot cheaper to create
+    and to store than a :class:`geopy.point.Point`, which parses and
+    normalizes its values on creation.  The values are taken as given:
+
+        >>> coordinate = Coordinate(12.3456, 12.3456, 12.3456)
+        >>> coordinate
+        Coordinate(12.3456, 12.3456, 12.3456)
+
+        >>> coordinate.latitude, coordinate.longitude, coordinate.altitude
+        (12.3456, 12.3456, 12.3456)
+
+        >>> latitude, longitude, altitude = coordinate
+
+    All functions in :mod:`geoanonymizer.spatial.mask` accept coordinates and
+    return coordinates for them.  Conversion from and to a
+    :class:`geopy.point.Point` happens on request only:
+
+        >>> coordinate.to_point()
+        Point(12.3456, 12.3456, 12.3456)
+
+        >>> Coordinate.from_point(Point(12.3456, 12.3456, 12.3456))
+        Coordinate(12.3456, 12.3456, 12.3456)
+
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, latitude=0.0, longitude=0.0, altitude=0.0):
+        return tuple.__new__(cls, (latitude, longitude, altitude))
+
+    @classmethod
+    def normalized(cls, latitude=0.0, longitude=0.0, altitude=0.0):
+        """
+        Create a coordinate, while rotating latitude and longitude around the
+        globe into their value range, like :class:`geopy.point.Point` does:
+
+            >>> Coordinate.normalized(112.3456, 12.3456, 12.3456)
+            Coordinate(-67.65440000000001, 12.3456, 12.3456)
+
+        :rtype: :class:`.Coordinate`
+        """
+        if not -90 <= latitude <= 90:
+            latitude = ((latitude + 90) % 180) - 90
+        if not -180 <= longitude <= 180:
+            longitude = ((longitude + 180) % 360) - 180
+        return tuple.__new__(cls, (latitude, longitude, altitude))
+
+    @classmethod
+    def from_point(cls, point):
+        """
+        Create a coordinate from a :class:`geopy.point.Point` or any sequence
+        of latitude, longitude and altitude.
+
+        :rtype: :class:`.Coordinate`
+        """
+        return tuple.__new__(cls, (point[0], point[1], point[2]))
+
+    latitude = property(itemgetter(0), doc="""
+        Location's latitude.
+
+        :rtype: float
+        """)
+
+    longitude = property(itemgetter(1), doc="""
+        Location's longitude.
+
+        :rtype: float
+        """)
+
+    altitude = property(itemgetter(2), doc="""
+        Location's altitude.
+
+        :rtype: float
+        """)
+
+    def to_point(self):
+        """
+        Convert to a :class:`geopy.point.Point` instance.
+
+        :rtype: :class:`geopy.point.Point`
+        """
+        return Point(self[0], self[1], self[2])
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    def __repr__(self):
+        return "Coordinate(%r, %r, %r)" % self
@@ -15,3 +15,124 @@ Functions to filter spatial coordinates.
     <https://www.hindawi.com/journals/amed/2014/567049/#sec7>`_
 
 """
+
+from geoanonymizer.spatial.index import PolygonIndex
+
+
+class SpatialFilter(object):
+    """
+    Contains polygons of `allowed` and `forbidden` areas, ie. a physical land
+    base and the surface water bodies on it.  A point is acceptable if it is
+    on any of the allowed polygons, unless no allowed polygons are given, and
+    not on any of the forbidden polygons.  Polygons are given as tuples of
+    `(x, y)` vertices, hence longitude and latitude, like in
+    :mod:`geoanonymizer.spatial.shape`:
+
+        >>> from geopy.point import Point
+        >>> land = ((0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (0.0, 4.0))
+        >>> lake = ((1.0, 1.0), (3.0, 1.0), (3.0, 3.0), (1.0, 3.0))
+        >>> spatial_filter = SpatialFilter(allowed=[land], forbidden=[lake])
+
+        >>> spatial_filter.accepts(Point(0.5, 0.5))
+        True
+
+        >>> spatial_filter.accepts(Point(2.0, 2.0))
+        False
+
+        >>> spatial_filter.accepts(Point(5.0, 5.0))
+        False
+
+    A filter wraps any function of :mod:`geoanonymizer.spatial.mask`, drawing
+    new displacements until the masked point is acceptable:
+
+        >>> from geoanonymizer.spatial.mask import displace_within_a_circle
+        >>> masked = spatial_filter.mask(
+        ...     displace_within_a_circle, Point(0.5, 0.5), 1.0)
+        >>> spatial_filter.accepts(masked)
+        True
+
+        >>> spatial_filter.attempts - spatial_filter.rejections
+        1
+
+    The polygons are held in a
+    :class:`geoanonymizer.spatial.index.PolygonIndex`, hence only the few
+    polygons with bounds around a point are tested.  Large polygons can be
+    given as :class:`geoanonymizer.spatial.shape.GridPolygon`.
+    """
+
+    __slots__ = ("_allowed", "_forbidden", "_attempts", "_rejections")
+
+    def __init__(self, allowed=None, forbidden=()):
+        self._allowed = None if allowed is None else PolygonIndex(allowed)
+        self._forbidden = PolygonIndex(forbidden)
+        self._attempts = 0
+        self._rejections = 0
+
+    @property
+    def attempts(self):
+        """
+        Amount of masked points tested by :meth:`.mask` so far.
+
+        :rtype: int
+        """
+        return self._attempts
+
+    @property
+    def rejections(self):
+        """
+        Amount of masked points rejected by :meth:`.mask` so far.
+
+        :rtype: int
+        """
+        return self._rejections
+
+    def accepts(self, point):
+        """
+        Check if the given `point` is acceptable.
+
+        :rtype: bool
+        """
+        # beware that longitude is x and latitude is y !
+        x, y = point[1], point[0]
+        if self._allowed is not None and not self._allowed.contains(x, y):
+            return False
+        return not self._forbidden.contains(x, y)
+
+    def mask(self, function, point, *args, **kwargs):
+        """
+        Mask the given `point` by calling the given `function` with the given
+        arguments, until the masked point is acceptable, or raise a
+        :class:`ValueError` after `max_attempts`, defaulting to 100.
+
+        :rtype: :class:`geopy.point.Point`
+        """
+        max_attempts = kwargs.pop('max_attempts', 100)
+        for _ in range(max_attempts):
+            masked = function(point, *args, **kwargs)
+            self._attempts += 1
+            if self.accepts(masked):
+                return masked
+            self._rejections += 1
+        raise ValueError(
+            "no acceptable point found after %d attempts" % max_attempts)
+
+    def wrap(self, function, max_attempts=100):
+        """
+        Wrap the given `function` of :mod:`geoanonymizer.spatial.mask`, to
+        mask with this filter applied.
+
+            >>> land = ((0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (0.0, 4.0))
+            >>> from geoanonymizer.spatial.mask import displace_on_a_circle
+            >>> mask = SpatialFilter([land]).wrap(displace_on_a_circle)
+            >>> mask((0.0, 0.0, 0.0), 1.0)  # doctest: +ELLIPSIS
+            Point(...)
+
+        :rtype: function
+        """
+        def _mask(point, *args, **kwargs):
+            kwargs.setdefault('max_attempts', max_attempts)
+            return self.mask(function, point, *args, **kwargs)
+
+        _mask.__name__ = getattr(function, '__name__', 'mask')
+        _mask.__doc__ = getattr(function, '__doc__', None)
+        return _mask
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+"""
+Road networks, or any other graph of paths, telling which locations are
+reachable from a location within a path length.
+"""
+
+import collections
+import heapq
+import itertools
+import math
+
+
+class RoadGraph(object):
+    """
+    Contains the given `nodes`, a mapping of node ids to `(x, y)`, and the
+    directed `arcs` between them, given as `(from, to, length)`, hence roads
+    passable in both directions need an arc in each direction:
+
+        >>> graph = RoadGraph({1: (0.0, 0.0), 2: (1.0, 0.0), 3: (3.0, 0.0)},
+        ...                   [(1, 2, 1.0), (2, 1, 1.0),
+        ...                    (2, 3, 2.0), (3, 2, 2.0)])
+
+    Coordinates are snapped to their nearest node, which is looked up in a
+    grid of cells of `cellsize`, by default sized to hold about one node
+    each:
+
+        >>> graph.snap(2.2, 0.5)
+        3
+
+    The nodes reachable from a node within a path length are found by a
+    Dijkstra search stopping at that length, and cached for up to
+    `cache_size` nodes, hence locations of the same area share their
+    searches:
+
+        >>> sorted(graph.reachable(1, 2.5).items())
+        [(1, 0.0), (2, 1.0)]
+
+    """
+
+    __slots__ = ("_nodes", "_arcs", "_cellsize", "_cells", "_extent",
+                 "_cache", "_cache_size")
+
+    def __init__(self, nodes, arcs, cellsize=None, cache_size=4096):
+        if not nodes:
+            raise ValueError("a road graph needs at least one node")
+        self._nodes = dict(nodes)
+        self._arcs = {}
+        for start, end, length in arcs:
+            if start not in self._nodes or end not in self._nodes:
+                raise ValueError(
+                    "arc (%r, %r) has an unknown node" % (start, end))
+            self._arcs.setdefault(start, []).append((end, float(length)))
+
+        xs = [x for x, _ in self._nodes.values()]
+        ys = [y for _, y in self._nodes.values()]
+        if cellsize is None:
+            area = (max(xs) - min(xs)) * (max(ys) - min(ys))
+            cellsize = math.sqrt(area / len(self._nodes)) or 1.0
+        self._cellsize = float(cellsize)
+        self._cells = {}
+        for node, (x, y) in self._nodes.items():
+            self._cells.setdefault(self._cell(x, y), []).append(node)
+        minimum = self._cell(min(xs), min(ys))
+        maximum = self._cell(max(xs), max(ys))
+        self._extent = (minimum[0], minimum[1], maximum[0], maximum[1])
+
+        self._cache = collections.OrderedDict()
+        self._cache_size = cache_size
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """
+        Create a road graph from the file at `path` with lines in the format
+        of the DIMACS shortest path challenge, but nodes and arcs in one
+        file: `v <id> <x> <y>` for each node, `a <from> <to> <length>` for
+        each arc, and `c` for comments.  Further `kwargs` are passed to
+        :class:`.RoadGraph`:
+
+            >>> import os, tempfile
+            >>> path = os.path.join(tempfile.mkdtemp(), 'roads.txt')
+            >>> with open(path, 'w') as stream:
+            ...     _ = stream.write('c two nodes\\nv 1 0 0\\nv 2 0 1\\n'
+            ...                      'a 1 2 1.5\\n')
+            >>> RoadGraph.from_file(path)
+            RoadGraph(2, 1)
+
+        :rtype: :class:`.RoadGraph`
+        """
+        nodes, arcs = {}, []
+        with open(path) as stream:
+            for number, line in enumerate(stream, 1):
+                fields = line.split()
+                if not fields or fields[0] in ('c', 'p'):
+                    continue
+                if fields[0] == 'v' and len(fields) == 4:
+                    nodes[int(fields[1])] = (float(fields[2]),
+                                             float(fields[3]))
+                elif fields[0] == 'a' and len(fields) == 4:
+                    arcs.append((int(fields[1]), int(fields[2]),
+                                 float(fields[3])))
+                else:
+                    raise ValueError(
+                        "line %d of %r has an unsupported format: %r" %
+                        (number, path, line.rstrip()))
+        return cls(nodes, arcs, **kwargs)
+
+    @property
+    def nodes(self):
+        """
+        The coordinates of the nodes by their ids.
+
+        :rtype: dict
+        """
+        return self._nodes
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self._cellsize)),
+                int(math.floor(y / self._cellsize)))
+
+    def snap(self, x, y):
+        """
+        Return the id of the node nearest to the given coordinate.
+        """
+        column, row = self._cell(x, y)
+        minx, miny, maxx, maxy = self._extent
+        rings = max(column - minx, maxx - column, row - miny, maxy - row)
+
+        nearest, best = None, None
+        for ring in range(max(rings, 0) + 1):
+            for cell in self._ring(column, row, ring):
+                for node in self._cells.get(cell, ()):
+                    nx, ny = self._nodes[node]
+                    distance = (nx - x) ** 2 + (ny - y) ** 2
+                    if best is None or distance < best:
+                        nearest, best = node, distance
+            # nodes of the next rings are at least `ring` cells away
+            if best is not None and best <= (ring * self._cellsize) ** 2:
+                break
+        return nearest
+
+    @staticmethod
+    def _ring(column, row, ring):
+        if ring == 0:
+            yield column, row
+            return
+        for offset in range(-ring, ring + 1):
+            yield column + offset, row - ring
+            yield column + offset, row + ring
+        for offset in range(-ring + 1, ring):
+            yield column - ring, row + offset
+            yield column + ring, row + offset
+
+    def reachable(self, node, distance):
+        """
+        Return the path lengths of the nodes reachable from the given `node`
+        within the given `distance`, by their ids.  The returned mapping may
+        be shared with later calls, hence it must not be changed.
+
+        :rtype: dict
+        """
+        cached = self._cache.pop(node, None)
+        if cached is None or cached[0] < distance:
+            cached = (distance, self._search(node, distance))
+        self._cache[node] = cached
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+        limit, lengths = cached
+        if limit == distance:
+            return lengths
+        return dict((other, length) for other, length in lengths.items()
+                    if length <= distance)
+
+    def _search(self, node, distance):
+        # a counter breaks ties of lengths, hence node ids are not compared
+        # and may be of any hashable type
+        lengths = {}
+        counter = itertools.count()
+        heap = [(0.0, next(counter), node)]
+        while heap:
+            length, _, current = heapq.heappop(heap)
+            if current in lengths:
+                continue
+            lengths[current] = length
+            for other, arc in self._arcs.get(current, ()):
+                total = length + arc
+                if total <= distance and other not in lengths:
+                    heapq.heappush(heap, (total, next(counter), other))
+        return lengths
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __repr__(self):
+        return "RoadGraph(%d, %d)" % (
+            len(self._nodes), sum(len(arcs) for arcs in self._arcs.values()))
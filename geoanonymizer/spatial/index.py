@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""
+Spatial indexes telling which of many polygons contain a coordinate.
+"""
+
+import math
+
+from geoanonymizer.spatial.shape import PreparedPolygon
+
+
+class RTree(object):
+    """
+    Contains bounding boxes, given as `(minx, miny, maxx, maxy)`, packed into
+    a static R-tree of nodes with up to `capacity` entries each, using the
+    Sort-Tile-Recursive algorithm: the boxes are sorted by the `x` of their
+    centres, cut into vertical slices, and each slice is sorted by the `y` of
+    their centres and cut into nodes.  Hence the tree is built once, with its
+    nodes filled completely and overlapping little:
+
+        >>> tree = RTree([(0.0, 0.0, 1.0, 1.0), (1.0, 0.0, 2.0, 1.0),
+        ...               (5.0, 5.0, 6.0, 6.0)])
+
+        >>> sorted(tree.query(1.0, 0.5))
+        [0, 1]
+
+        >>> list(tree.query(3.0, 3.0))
+        []
+
+    Each node is a tuple of `(minx, miny, maxx, maxy, leaf, children)`, with
+    tuples of the given bounding boxes and their index, ie. `(minx, miny,
+    maxx, maxy, index)`, as children of the leaves.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, bounds, capacity=16):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2, got %r" % capacity)
+        self._size = len(bounds)
+        self._root = None
+        if not self._size:
+            return
+
+        entries = [tuple(box) + (index,) for index, box in enumerate(bounds)]
+        nodes = self._pack(entries, capacity, True)
+        while len(nodes) > 1:
+            nodes = self._pack(nodes, capacity, False)
+        self._root = nodes[0]
+
+    @staticmethod
+    def _node(children, leaf):
+        return (min(child[0] for child in children),
+                min(child[1] for child in children),
+                max(child[2] for child in children),
+                max(child[3] for child in children),
+                leaf,
+                tuple(children))
+
+    @classmethod
+    def _pack(cls, nodes, capacity, leaf):
+        pages = int(math.ceil(len(nodes) / float(capacity)))
+        slices = int(math.ceil(math.sqrt(pages)))
+        length = slices * capacity
+
+        nodes = sorted(nodes, key=lambda node: node[0] + node[2])
+        packed = []
+        for start in range(0, len(nodes), length):
+            tile = sorted(nodes[start:start + length],
+                          key=lambda node: node[1] + node[3])
+            for offset in range(0, len(tile), capacity):
+                packed.append(cls._node(tile[offset:offset + capacity], leaf))
+        return packed
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def root(self):
+        """
+        The root node as tuple of `(minx, miny, maxx, maxy, leaf, children)`,
+        or None if the tree is empty.
+
+        :rtype: tuple
+        """
+        return self._root
+
+    def query(self, x, y):
+        """
+        Yield the indices of all bounding boxes containing the given `x`/`y`
+        coordinate.
+        """
+        if self._root is None:
+            return
+        stack = [self._root]
+        while stack:
+            minx, miny, maxx, maxy, leaf, children = stack.pop()
+            if not (minx <= x <= maxx and miny <= y <= maxy):
+                continue
+            if leaf:
+                for minx, miny, maxx, maxy, index in children:
+                    if minx <= x <= maxx and miny <= y <= maxy:
+                        yield index
+            else:
+                stack.extend(children)
+
+    def __repr__(self):
+        return "RTree(%d)" % self._size
+
+
+class PolygonIndex(object):
+    """
+    Contains many polygons, given as tuples of vertices or prepared polygons
+    of :mod:`geoanonymizer.spatial.shape`, with an :class:`.RTree` over their
+    bounds.  Hence locating the polygon of a coordinate tests its exact shape
+    only for the few polygons with matching bounds:
+
+        >>> west = ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0))
+        >>> east = ((1.0, 0.0), (2.0, 0.0), (2.0, 1.0), (1.0, 1.0))
+        >>> index = PolygonIndex([west, east])
+
+        >>> index.locate(1.5, 0.5)
+        1
+
+        >>> index.locate(3.0, 0.5) is None
+        True
+
+    Coordinates on the boundary of several polygons are located in the one
+    with the lowest index:
+
+        >>> index.locate(1.0, 0.5)
+        0
+
+    Tuples of vertices are wrapped into a
+    :class:`geoanonymizer.spatial.shape.PreparedPolygon`, large polygons
+    should be given as :class:`geoanonymizer.spatial.shape.GridPolygon`, and
+    polygons with holes or several parts as
+    :class:`geoanonymizer.spatial.shape.MultiPolygon`.  If the `bounds` of the
+    polygons are given, the polygons are taken as they are, and accessed when
+    testing coordinates within their bounds only, ie. when loaded on demand
+    from a :class:`geoanonymizer.spatial.batch.store.PolygonStore`.
+
+    Beware:
+        - latitude is `y` and longitude is `x`
+        - coordinates and polygons must use the same geodesic projection
+          system
+    """
+
+    __slots__ = ("_polygons", "_tree")
+
+    def __init__(self, polygons, capacity=16, bounds=None):
+        if bounds is None:
+            self._polygons = tuple(
+                polygon if hasattr(polygon, 'contains') else
+                PreparedPolygon(polygon) for polygon in polygons
+            )
+            bounds = [polygon.bounds for polygon in self._polygons]
+        else:
+            self._polygons = polygons
+        self._tree = RTree(bounds, capacity)
+
+    def __len__(self):
+        return len(self._polygons)
+
+    def __getitem__(self, index):
+        return self._polygons[index]
+
+    @property
+    def polygons(self):
+        """
+        The indexed polygons.
+
+        :rtype: sequence
+        """
+        return self._polygons
+
+    @property
+    def tree(self):
+        """
+        The R-tree over the bounds of the polygons.
+
+        :rtype: :class:`.RTree`
+        """
+        return self._tree
+
+    def query(self, x, y):
+        """
+        Return the sorted indices of the candidate polygons, whose bounds
+        contain the given `x`/`y` coordinate.
+
+        :rtype: list
+        """
+        return sorted(self._tree.query(x, y))
+
+    def locate(self, x, y):
+        """
+        Return the index of the polygon containing the given `x`/`y`
+        coordinate, or None if there is none.
+
+        :rtype: int
+        """
+        for index in self.query(x, y):
+            if self._polygons[index].contains(x, y):
+                return index
+        return None
+
+    def contains(self, x, y):
+        """
+        Check if the given `x`/`y` coordinate is on any polygon.
+
+        :rtype: bool
+        """
+        return self.locate(x, y) is not None
+
+    def __repr__(self):
+        return "PolygonIndex(%d)" % len(self._polygons)
@@ -15,19 +15,73 @@ Functions to mask spatial coordinates.
 Some implementations are inspired by `chapter 7 of Ensuring Confidentiality of
 Geocoded Health Data: Assessing Geographic Masking Strategies for Individual-
 Level Data <https://www.hindawi.com/journals/amed/2014/567049/#sec7>`_.
+
+All functions accept a :class:`geopy.point.Point` as well as a lightweight
+:class:`geoanonymizer.spatial.coordinate.Coordinate`, returning the same type.
+
+All functions drawing random numbers accept an optional `generator`, which
+defaults to the global :mod:`random` module.  Pass a :class:`random.Random`
+or a :class:`geoanonymizer.randomstream.RandomStream` instance to get
+reproducible results, independent of other threads or processes.
+
+All functions displacing by a radius accept an optional `metric` flag.  If it
+is true, the radius is given in metres instead of degrees, and converted to
+degrees at each point's latitude, see
+:func:`geoanonymizer.spatial.projection.metres_per_degree`.  The altitude is
+displaced by the same amount of metres.  With the `geodesic` flag, the radius
+is given in metres too, but the points are displaced along geodesics on the
+WGS84 ellipsoid, see :meth:`geopy.distance.geodesic.destination`, instead of
+adding degrees.
 """
 
+from geopy.distance import distance
 from geopy.point import Point
+from geoanonymizer.spatial.coordinate import Coordinate
+from geoanonymizer.spatial.projection import metres_per_degree
 import math
 import random
 
 
-def _random_angle_in_radians():
+def _random_angle_in_radians(generator=random):
     # This implementation uses human readable degrees with reduced precision
-    # random.uniform(0, 360) * math.pi / 180
+    # generator.uniform(0, 360) * math.pi / 180
 
     # We simplfy the implementation by calculating directly in radians
-    return random.uniform(0, 2) * math.pi
+    return generator.uniform(0, 2) * math.pi
+
+
+def _metres_to_degrees(point, x, y):
+    # beware that longitude is x and latitude is y !
+    latitude, longitude = metres_per_degree(point[0])
+    return x / longitude, y / latitude
+
+
+def _displace_along_geodesic(point, x, y, z=0.0):
+    # beware that longitude is x and latitude is y, while the bearing is
+    # measured clockwise from north !
+    destination = distance(meters=math.hypot(x, y)).destination(
+        Point(point[0], point[1]), math.degrees(math.atan2(x, y)))
+    latitude, longitude = destination.latitude, destination.longitude
+    altitude = point[2] + z
+
+    if isinstance(point, Coordinate):
+        return Coordinate.normalized(latitude, longitude, altitude)
+    return Point(latitude, longitude, altitude)
+
+
+def _limit(value, precision):
+    if 0 < precision:
+        return round(value, precision)
+
+    # Decimals with less digits than the given absolute precision keep the
+    # last remaining digit intact, hence we try every precision.
+    while 0 > precision:
+        calculus = 10 ** (-1 * precision)
+        if calculus < value:
+            return round(value / calculus) * calculus
+        precision += 1
+
+    return value
 
 
 def limit_precision(point, precisions=(None, None, None)):
@@ -98,22 +152,13 @@ def limit_precision(point, precisions=(None, None, None)):
         Point(70.0, 70.0, 700.0)
 
     """
-    def _limit(value, precision):
-        if 0 < precision:
-            value = round(value, precision)
-        elif 0 > precision:
-            calculus = 10 ** (-1 * precision)
-            if calculus < value:
-                value = round(value / calculus) * calculus
-            else:
-                value = _limit(value, precision + 1)
-        return value
-
-    return Point(
-        _limit(point[0], precisions[0] or 0),
-        _limit(point[1], precisions[1] or 0),
-        _limit(point[2], precisions[2] or 0)
-    )
+    latitude = _limit(point[0], precisions[0] or 0)
+    longitude = _limit(point[1], precisions[1] or 0)
+    altitude = _limit(point[2], precisions[2] or 0)
+
+    if isinstance(point, Coordinate):
+        return Coordinate(latitude, longitude, altitude)
+    return Point(latitude, longitude, altitude)
 
 
 def add_vector(point, vector=(None, None, None)):
@@ -152,16 +197,25 @@ def add_vector(point, vector=(None, None, None)):
         >>> add_vector(coordinate, (-100.0, -100.0, -100.0))
         Point(-87.6544, -87.6544, -87.6544)
 
+    Lightweight coordinates are moved the same way, but remain coordinates:
+
+        >>> add_vector(Coordinate(12.3456, 12.3456, 12.3456), (1.0, 1.0, 1.0))
+        Coordinate(13.3456, 13.3456, 13.3456)
+
     """
 
-    return Point(
-        point[0] + (vector[0] or 0.0),
-        point[1] + (vector[1] or 0.0),
-        point[2] + (vector[2] or 0.0)
-    )
+    latitude = point[0] + (vector[0] or 0.0)
+    longitude = point[1] + (vector[1] or 0.0)
+    altitude = point[2] + (vector[2] or 0.0)
+
+    if isinstance(point, Coordinate):
+        return Coordinate.normalized(latitude, longitude, altitude)
+    return Point(latitude, longitude, altitude)
 
 
-def displace_on_a_circle(point, radius=0.0):
+def displace_on_a_circle(point, radius=0.0, generator=random,
+                         metric=False,
+                         geodesic=False):
     """
     Masked points are placed on a random location on a circle around the
     original location.  Masked points are not placed inside the circle itself.
@@ -198,6 +252,24 @@ def displace_on_a_circle(point, radius=0.0):
         >>> displace_on_a_circle(coordinate, 1)
         Point(0.7474634341555553, 0.6643029539301958, 0.0)
 
+        >>> displace_on_a_circle(coordinate, 1, random.Random(1))
+        Point(0.7474634341555553, 0.6643029539301958, 0.0)
+
+    With the `metric` flag, the radius is given in metres:
+
+        >>> displaced = displace_on_a_circle(coordinate, 1000, metric=True)
+        >>> round(distance(coordinate, displaced).meters)
+        1000
+
+    With the `geodesic` flag, the radius is given in metres too, but the point
+    is displaced along a geodesic, hence the distance is exact at any
+    latitude:
+
+        >>> north = Point(80.0, 0.0, 0.0)
+        >>> displaced = displace_on_a_circle(north, 5000, geodesic=True)
+        >>> round(distance(north, displaced).meters, 6)
+        5000.0
+
     """
 
     if radius is None or radius is 0:
@@ -205,15 +277,22 @@ def displace_on_a_circle(point, radius=0.0):
     elif 0 > radius:
         radius *= -1
 
-    a = _random_angle_in_radians()
+    a = _random_angle_in_radians(generator)
     x = math.cos(a) * radius
     y = math.sin(a) * radius
 
+    if geodesic:
+        return _displace_along_geodesic(point, x, y)
+    elif metric:
+        x, y = _metres_to_degrees(point, x, y)
+
     # beware that longitude is x and latitude is y !
     return add_vector(point, (y, x, 0))
 
 
-def displace_on_a_sphere(point, radius=0.0):
+def displace_on_a_sphere(point, radius=0.0, generator=random,
+                         metric=False,
+                         geodesic=False):
     """
     Masked points are placed on a random location on a sphere around the
     original location.  Masked points are not placed inside the sphere itself.
@@ -256,17 +335,24 @@ def displace_on_a_sphere(point, radius=0.0):
     elif 0 > radius:
         radius *= -1
 
-    a1 = _random_angle_in_radians()
-    a2 = _random_angle_in_radians()
+    a1 = _random_angle_in_radians(generator)
+    a2 = _random_angle_in_radians(generator)
     x = math.cos(a1) * math.sin(a2) * radius
     y = math.sin(a1) * math.sin(a2) * radius
     z = math.cos(a2) * radius
 
+    if geodesic:
+        return _displace_along_geodesic(point, x, y, z)
+    elif metric:
+        x, y = _metres_to_degrees(point, x, y)
+
     # beware that longitude is x and latitude is y !
     return add_vector(point, (y, x, z))
 
 
-def displace_within_a_circle(point, radius=0.0):
+def displace_within_a_circle(point, radius=0.0, generator=random,
+                             metric=False,
+                             geodesic=False):
     """
     Masked locations are placed anywhere within a circular area around the
     original location.  Since every location within the circle is equally
@@ -320,12 +406,15 @@ def displace_within_a_circle(point, radius=0.0):
     elif 0 > radius:
         radius *= -1
 
-    radius = random.uniform(0, radius)
+    radius = generator.uniform(0, radius)
 
-    return displace_on_a_circle(point, radius)
+    return displace_on_a_circle(point, radius, generator, metric,
+                                geodesic)
 
 
-def displace_within_a_sphere(point, radius=0.0):
+def displace_within_a_sphere(point, radius=0.0, generator=random,
+                             metric=False,
+                             geodesic=False):
     """
     Masked locations are placed anywhere within a spherical space around the
     original location.  Since every location within the sphere is equally
@@ -378,14 +467,18 @@ def displace_within_a_sphere(point, radius=0.0):
     elif 0 > radius:
         radius *= -1
 
-    radius = random.uniform(0, radius)
+    radius = generator.uniform(0, radius)
 
-    return displace_on_a_sphere(point, radius)
+    return displace_on_a_sphere(point, radius, generator, metric,
+                                geodesic)
 
 
 def displace_within_a_circular_donut(point,
                                      radius_inner=0.5,
-                                     radius_outer=1.0):
+                                     radius_outer=1.0,
+                                     generator=random,
+                                     metric=False,
+                                     geodesic=False):
     """
     This technique is similar to random displacement within a circle, but a
     smaller internal circle is utilized within which displacement is not
@@ -414,14 +507,18 @@ def displace_within_a_circular_donut(point,
 
     """
 
-    radius = random.uniform(radius_inner, radius_outer)
+    radius = generator.uniform(radius_inner, radius_outer)
 
-    return displace_on_a_circle(point, radius)
+    return displace_on_a_circle(point, radius, generator, metric,
+                                geodesic)
 
 
 def displace_within_a_spherical_donut(point,
                                       radius_inner=0.5,
-                                      radius_outer=1.0):
+                                      radius_outer=1.0,
+                                      generator=random,
+                                      metric=False,
+                                      geodesic=False):
     """
     This technique is similar to random displacement within a sphere, but a
     smaller internal sphere is utilized within which displacement is not
@@ -449,12 +546,16 @@ def displace_within_a_spherical_donut(point,
 
     """
 
-    radius = random.uniform(radius_inner, radius_outer)
+    radius = generator.uniform(radius_inner, radius_outer)
 
-    return displace_on_a_sphere(point, radius)
+    return displace_on_a_sphere(point, radius, generator, metric,
+                                geodesic)
 
 
-def circular_gaussian_displacement(point, mu=1.0, sigma=1.0):
+def circular_gaussian_displacement(point, mu=1.0, sigma=1.0,
+                                   generator=random,
+                                   metric=False,
+                                   geodesic=False):
     """
     The direction of displacement is random, but the distance follows a
     Gaussian distribution, where `mu` is the mean and `sigma` is the standard
@@ -477,12 +578,16 @@ def circular_gaussian_displacement(point, mu=1.0, sigma=1.0):
 
     """
 
-    radius = random.gauss(mu, sigma)
+    radius = generator.gauss(mu, sigma)
 
-    return displace_on_a_circle(point, radius)
+    return displace_on_a_circle(point, radius, generator, metric,
+                                geodesic)
 
 
-def spherical_gaussian_displacement(point, mu=1.0, sigma=1.0):
+def spherical_gaussian_displacement(point, mu=1.0, sigma=1.0,
+                                    generator=random,
+                                    metric=False,
+                                    geodesic=False):
     """
     The direction of displacement is random, but the distance follows a
     Gaussian distribution, where `mu` is the mean and `sigma` is the standard
@@ -504,16 +609,20 @@ def spherical_gaussian_displacement(point, mu=1.0, sigma=1.0):
 
     """
 
-    radius = random.gauss(mu, sigma)
+    radius = generator.gauss(mu, sigma)
 
-    return displace_on_a_sphere(point, radius)
+    return displace_on_a_sphere(point, radius, generator, metric,
+                                geodesic)
 
 
 def circular_bimodal_gaussian_displacement(point,
                                            inner_mu=1.0,
                                            inner_sigma=1.0,
                                            outer_mu=2.0,
-                                           outer_sigma=1.0):
+                                           outer_sigma=1.0,
+                                           generator=random,
+                                           metric=False,
+                                           geodesic=False):
     """
     This is a variation on the Gaussian masking technique, employing a bimodal
     Gaussian distribution for the random distance function.  In effect, this
@@ -537,17 +646,21 @@ def circular_bimodal_gaussian_displacement(point,
 
     """
 
-    inner_radius = random.gauss(inner_mu, inner_sigma)
-    outer_radius = random.gauss(outer_mu, outer_sigma)
+    inner_radius = generator.gauss(inner_mu, inner_sigma)
+    outer_radius = generator.gauss(outer_mu, outer_sigma)
 
-    return displace_within_a_circular_donut(point, inner_radius, outer_radius)
+    return displace_within_a_circular_donut(point, inner_radius, outer_radius,
+                                            generator, metric, geodesic)
 
 
 def spherical_bimodal_gaussian_displacement(point,
                                             inner_mu=1.0,
                                             inner_sigma=1.0,
                                             outer_mu=2.0,
-                                            outer_sigma=1.0):
+                                            outer_sigma=1.0,
+                                            generator=random,
+                                            metric=False,
+                                            geodesic=False):
     """
     This is a variation on the Gaussian masking technique, employing a bimodal
     Gaussian distribution for the random distance function.  In effect, this
@@ -570,7 +683,8 @@ def spherical_bimodal_gaussian_displacement(point,
 
     """
 
-    inner_radius = random.gauss(inner_mu, inner_sigma)
-    outer_radius = random.gauss(outer_mu, outer_sigma)
+    inner_radius = generator.gauss(inner_mu, inner_sigma)
+    outer_radius = generator.gauss(outer_mu, outer_sigma)
 
-    return displace_within_a_spherical_donut(point, inner_radius, outer_radius)
+    return displace_within_a_spherical_donut(point, inner_radius, outer_radius,
+                                             generator, metric, geodesic)
@@ -40,9 +40,12 @@ although they're utilizing Mercator (EPSG 3857) projection internally.
 
 import math
 
+# half the circumference of the Mercator (EPSG 3857) map area in metres
+_extent = 20037508.34
+
 
 def _generate_epsg_4326_to_epsg_3857_converter():
-    factor1 = 20037508.34 / 180
+    factor1 = _extent / 180
     factor2 = math.pi / 360
     factor3 = math.pi / 180
 
@@ -60,9 +63,9 @@ convert_gps_to_map_coordinates = _generate_epsg_4326_to_epsg_3857_converter()
 
 
 def _generate_epsg_3857_to_epsg_4326_converter():
-    factor1 = 180 / 20037508.34
+    factor1 = 180 / _extent
     factor2 = 360 / math.pi
-    factor3 = math.pi / 20037508.34
+    factor3 = math.pi / _extent
 
     def convert_epsg_3857_to_epsg_4326(x, y):
         """
@@ -75,3 +78,47 @@ def _generate_epsg_3857_to_epsg_4326_converter():
     return convert_epsg_3857_to_epsg_4326
 
 convert_map_to_gps_coordinates = _generate_epsg_3857_to_epsg_4326_converter()
+
+
+# latitude bands per degree, used to cache the metres per degree
+_bands = 100
+
+_metres_per_degree_table = []
+
+
+def _get_metres_per_degree_table():
+    if not _metres_per_degree_table:
+        for band in range(180 * _bands + 1):
+            latitude = math.radians(float(band) / _bands - 90)
+            _metres_per_degree_table.append((
+                111132.92 - 559.82 * math.cos(2 * latitude) +
+                1.175 * math.cos(4 * latitude) -
+                0.0023 * math.cos(6 * latitude),
+                111412.84 * math.cos(latitude) -
+                93.5 * math.cos(3 * latitude) +
+                0.118 * math.cos(5 * latitude)
+            ))
+    return _metres_per_degree_table
+
+
+def metres_per_degree(latitude):
+    """
+    Return the length of one degree latitude and one degree longitude in
+    metres at the given WGS84 (EPSG 4326) `latitude`.  The lengths are computed
+    once for latitude bands of 1/100 degree and cached, hence their relative
+    error stays below 0.05 % up to 80 degrees latitude.
+
+        >>> metres_per_degree(0.0)
+        (110574.2727, 111319.458)
+
+        >>> [int(length) for length in metres_per_degree(60.0)]
+        [111412, 55799]
+
+    Latitudes beyond the poles get the lengths at the nearest pole:
+
+        >>> metres_per_degree(-95.0) == metres_per_degree(-90.0)
+        True
+
+    """
+    band = int(round((latitude + 90) * _bands))
+    return _get_metres_per_degree_table()[min(max(band, 0), 180 * _bands)]
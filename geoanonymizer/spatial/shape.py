@@ -4,6 +4,11 @@
 Functions dealing with shapes, especially points and polygons.
 """
 
+# classes of coordinates relative to a polygon, see :func:`.classify`
+OUTSIDE = 0
+BOUNDARY = 1
+INSIDE = 2
+
 
 def _is_a_vertex_of_polygon(x, y, polygon):
     """
@@ -133,7 +138,8 @@ def _is_inside_polygon(x, y, polygon):
         - coordinate and `polygon` must use the same geodesic projection system
         - this implementation (delibrately) fails for certain edge cases
 
-    This function implements the ray casting algorithm.
+    This function implements the ray casting algorithm.  It is superseded by
+    :func:`.classify`, which handles the edge cases in a single pass.
     """
 
     # _infinity is used to act as infinity if we divide by zero
@@ -188,6 +194,92 @@ def _is_inside_polygon(x, y, polygon):
     return inside
 
 
+def _edges(polygon):
+    """
+    Yield the edges of the `polygon` as tuples of `(ax, ay, bx, by, dx, dy)`,
+    ie. the vertices and the deltas between them.
+    """
+    for a, b in zip(polygon, tuple(polygon[1:]) + tuple(polygon[:1])):
+        yield a[0], a[1], b[0], b[1], b[0] - a[0], b[1] - a[1]
+
+
+def _winding_number(x, y, edges):
+    """
+    Return the winding number of the polygon of the given `edges` around the
+    `x`/`y` coordinate in a single pass, or None if the coordinate is on its
+    boundary.  Each edge crossing the horizontal line through the coordinate
+    upward (downward) counts one if the coordinate is left (right) of it, as
+    told by the sign of the cross product, which is zero for coordinates on
+    the edge.  Hence no nudging of coordinates is needed.
+    """
+    winding = 0
+    for ax, ay, bx, by, dx, dy in edges:
+        if ay == y:
+            if ax == x:
+                return None
+            if by == y and (ax <= x <= bx or bx <= x <= ax):
+                return None
+        if ay <= y < by:
+            cross = dx * (y - ay) - (x - ax) * dy
+            if cross > 0:
+                winding += 1
+            elif cross == 0:
+                return None
+        elif by <= y < ay:
+            cross = dx * (y - ay) - (x - ax) * dy
+            if cross < 0:
+                winding -= 1
+            elif cross == 0:
+                return None
+    return winding
+
+
+def _classify(x, y, edges):
+    """
+    Classify the `x`/`y` coordinate relative to the polygon of the given
+    `edges` by its winding number, see :func:`._winding_number`.
+    """
+    winding = _winding_number(x, y, edges)
+    if winding is None:
+        return BOUNDARY
+    return INSIDE if winding else OUTSIDE
+
+
+def classify(x, y, polygon):
+    """
+    Classify the given `x`/`y` coordinate as :data:`INSIDE`, on the
+    :data:`BOUNDARY` or :data:`OUTSIDE` of the given `polygon`.
+
+        >>> polygon = ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0))
+
+        >>> classify(0.5, 0.5, polygon) == INSIDE
+        True
+
+        >>> classify(0.0, 0.5, polygon) == BOUNDARY
+        True
+
+        >>> classify(1.0, 1.0, polygon) == BOUNDARY
+        True
+
+        >>> classify(2.0, 0.0, polygon) == OUTSIDE
+        True
+
+    Areas of self-intersecting polygons wound around twice are inside, ie.
+    the non-zero winding rule is applied:
+
+        >>> polygon = ((0.0, 0.0), (2.0, 0.0), (2.0, 2.0), (1.0, 2.0),
+        ...            (1.0, 1.0), (3.0, 1.0), (3.0, 3.0), (0.0, 3.0))
+
+        >>> classify(1.5, 1.5, polygon) == INSIDE
+        True
+
+    Beware:
+        - latitude is `y` and longitude is `x`
+        - coordinate and `polygon` must use the same geodesic projection system
+    """
+    return _classify(x, y, _edges(polygon))
+
+
 def is_on_polygon(x, y, polygon, bounds=None):
     """
     Check if the given `x`/`y` coordinate is on the given `polygon`.
@@ -230,35 +322,460 @@ def is_on_polygon(x, y, polygon, bounds=None):
         - latitude is `y` and longitude is `x`
         - coordinate and `polygon` must use the same geodesic projection system
     """
-    if _is_a_vertex_of_polygon(x, y, polygon):
-        return True
-
-    if bounds is None:
-        minx, maxx = float('+inf'), float('-inf')
-        miny, maxy = minx, maxx
-        for point in polygon:
-            minx = min(minx, point[0])
-            miny = min(miny, point[1])
-            maxx = max(maxx, point[0])
-            maxy = max(maxy, point[1])
-    else:
+    if bounds is not None:
         minx, miny, maxx, maxy = bounds
+        if not _is_within_bounding_box(x, y, minx, miny, maxx, maxy):
+            return False
 
-    if not _is_within_bounding_box(x, y, minx, miny, maxx, maxy):
-        return False
+    return _classify(x, y, _edges(polygon)) != OUTSIDE
 
-    if _is_inside_polygon(x, y, polygon):
-        return True
 
-    # used a few lines below
-    _length = len(polygon)
+class PreparedPolygon(object):
+    """
+    Contains a `polygon` with its bounds, edges and vertices computed once,
+    hence testing many coordinates against the same polygon costs a single
+    pass over its edges per coordinate:
 
-    # make sure point is not an egde case from _is_inside_polygon
-    for index, point in enumerate(polygon):
-        A = point
-        B = polygon[(index + 1) % _length]
+        >>> polygon = PreparedPolygon(
+        ...     ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)))
 
-        if _is_on_line(x, y, A[0], A[1], B[0], B[1]):
-            return True
+        >>> polygon.bounds
+        (0.0, 0.0, 1.0, 1.0)
+
+        >>> polygon.contains(0.5, 0.5)
+        True
+
+        >>> polygon.contains(0.0, 0.5)
+        True
+
+        >>> polygon.contains(1.0, 1.0)
+        True
+
+        >>> polygon.contains(2.0, 0.0)
+        False
+
+    Like for :func:`.is_on_polygon`, coordinates on the boundary of the
+    polygon are on it.
+
+    Beware:
+        - latitude is `y` and longitude is `x`
+        - coordinate and `polygon` must use the same geodesic projection system
+    """
+
+    __slots__ = ("_polygon", "_bounds", "_edges", "_vertices")
+
+    def __init__(self, polygon):
+        polygon = tuple((point[0], point[1]) for point in polygon)
+        xs = [point[0] for point in polygon]
+        ys = [point[1] for point in polygon]
+
+        self._polygon = polygon
+        self._bounds = (min(xs), min(ys), max(xs), max(ys))
+        self._vertices = frozenset(polygon)
+        self._edges = tuple(_edges(polygon))
+
+    @property
+    def polygon(self):
+        """
+        The polygon's vertices as tuple of `(x, y)` tuples.
+
+        :rtype: tuple
+        """
+        return self._polygon
+
+    @property
+    def bounds(self):
+        """
+        The polygon's bounds as `(minx, miny, maxx, maxy)`.
+
+        :rtype: tuple
+        """
+        return self._bounds
+
+    def classify(self, x, y):
+        """
+        Classify the given `x`/`y` coordinate as :data:`INSIDE`, on the
+        :data:`BOUNDARY` or :data:`OUTSIDE` of the polygon, see
+        :func:`.classify`.
+
+        :rtype: int
+        """
+        minx, miny, maxx, maxy = self._bounds
+        if not (minx <= x <= maxx and miny <= y <= maxy):
+            return OUTSIDE
+
+        if (x, y) in self._vertices:
+            return BOUNDARY
+
+        return _classify(x, y, self._edges)
+
+    def contains(self, x, y):
+        """
+        Check if the given `x`/`y` coordinate is on the polygon.
+
+        :rtype: bool
+        """
+        return self.classify(x, y) != OUTSIDE
+
+    def __repr__(self):
+        return "PreparedPolygon(%r)" % (self._polygon,)
+
+
+def _orientation(ax, ay, bx, by, x, y):
+    """
+    Return the cross product telling if the `x`/`y` coordinate is left of
+    (positive), right of (negative) or on (zero) the line from `ax`/`ay` to
+    `bx`/`by`.
+    """
+    return (bx - ax) * (y - ay) - (x - ax) * (by - ay)
+
+
+class GridPolygon(object):
+    """
+    Contains a `polygon` rasterized into a grid of `size` by `size` cells over
+    its bounds, defaulting to about the square root of the amount of vertices
+    per side.  Each cell holds the edges overlapping it, and the winding
+    number of the polygon around its centre, hence most coordinates are
+    classified by a single cell lookup:
+
+        >>> polygon = GridPolygon(
+        ...     ((0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (2.0, 2.0), (0.0, 4.0)),
+        ...     size=4)
+
+        >>> polygon.contains(1.0, 0.5)
+        True
+
+        >>> polygon.contains(2.0, 3.0)
+        False
+
+        >>> polygon.contains(3.0, 3.0)
+        True
+
+        >>> polygon.classify(2.0, 2.0) == BOUNDARY
+        True
+
+    In cells crossed by edges, the winding number around a coordinate is the
+    one around the cell's centre, corrected by the edges of the cell crossing
+    the segment from the centre to the coordinate.  If the segment touches a
+    vertex or runs along an edge, all edges are tested instead.
+
+    The result is the same as the one of :func:`.classify`, hence grid
+    polygons can be used wherever a :class:`.PreparedPolygon` is used, ie.
+    for large polygons of countries and coastlines.
+
+    Beware:
+        - latitude is `y` and longitude is `x`
+        - coordinate and `polygon` must use the same geodesic projection system
+    """
+
+    __slots__ = ("_prepared", "_size", "_cellwidth", "_cellheight", "_cells",
+                 "_centres")
+
+    def __init__(self, polygon, size=None):
+        self._prepared = prepared = PreparedPolygon(polygon)
+        if size is None:
+            size = max(1, int(round(len(prepared.polygon) ** 0.5)))
+        minx, miny, maxx, maxy = prepared.bounds
+
+        self._size = size
+        self._cellwidth = (maxx - minx) / float(size) or 1.0
+        self._cellheight = (maxy - miny) / float(size) or 1.0
+        self._cells = [[] for _ in range(size * size)]
+        self._centres = [0] * (size * size)
+
+        for index, edge in enumerate(prepared._edges):
+            self._assign(index, edge)
+
+        for row in range(size):
+            self._classify_row(row)
+
+    def _cell(self, x, y):
+        minx, miny, _, _ = self._prepared.bounds
+        size = self._size
+        column = min(max(int((x - minx) // self._cellwidth), 0), size - 1)
+        row = min(max(int((y - miny) // self._cellheight), 0), size - 1)
+        return column, row
+
+    def _assign(self, index, edge):
+        ax, ay, bx, by, _, _ = edge
+        minx, miny, _, _ = self._prepared.bounds
+        width, height = self._cellwidth, self._cellheight
+        columns, rows = zip(self._cell(min(ax, bx), min(ay, by)),
+                            self._cell(max(ax, bx), max(ay, by)))
+
+        # the cells are inflated a little, so that rounding of their borders
+        # never drops an edge touching a coordinate within the cell
+        margin = 1e-9 * (width + height)
+        for row in range(rows[0], rows[1] + 1):
+            south = miny + row * height - margin
+            north = miny + (row + 1) * height + margin
+            for column in range(columns[0], columns[1] + 1):
+                west = minx + column * width - margin
+                east = minx + (column + 1) * width + margin
+                # the bounding boxes overlap, hence the edge overlaps the cell
+                # unless all corners are strictly on the same side of it
+                sides = [
+                    _orientation(ax, ay, bx, by, cx, cy) for cx, cy in (
+                        (west, south), (east, south),
+                        (west, north), (east, north)
+                    )
+                ]
+                if min(sides) > 0 or max(sides) < 0:
+                    continue
+                self._cells[row * self._size + column].append(index)
+
+    def _classify_row(self, row):
+        minx, miny, _, _ = self._prepared.bounds
+        y = miny + (row + 0.5) * self._cellheight
+        offset = row * self._size
+
+        previous = px = None
+        for column in range(self._size):
+            x = minx + (column + 0.5) * self._cellwidth
+            if previous is None:
+                centre = _winding_number(x, y, self._prepared._edges)
+            else:
+                # the segment from the previous centre lies within the cells
+                # of both centres, hence only their edges may cross it
+                indices = set(self._cells[offset + column - 1])
+                indices.update(self._cells[offset + column])
+                centre = self._walk(px, y, x, y, previous, indices)
+            self._centres[offset + column] = previous = centre
+            px = x
+
+    def _walk(self, px, py, x, y, winding, indices):
+        """
+        Return the winding number around the `x`/`y` coordinate from the
+        `winding` number around the `px`/`py` coordinate and the edges of the
+        given `indices`, the only ones which may cross the segment between
+        them, or None if the coordinate is on the boundary.
+        """
+        edges = self._prepared._edges
+        for index in indices:
+            ax, ay, bx, by, _, _ = edges[index]
+            end = _orientation(ax, ay, bx, by, x, y)
+            if end == 0 and (ax <= x <= bx or bx <= x <= ax) and (
+                    ay <= y <= by or by <= y <= ay):
+                return None
+            begin = _orientation(ax, ay, bx, by, px, py)
+            if (begin > 0 and end > 0) or (begin < 0 and end < 0):
+                continue
+            first = _orientation(px, py, x, y, ax, ay)
+            second = _orientation(px, py, x, y, bx, by)
+            if (first > 0 and second > 0) or (first < 0 and second < 0):
+                continue
+            if begin == 0 or end == 0 or first == 0 or second == 0:
+                # degenerate, the segment touches a vertex or runs along an
+                # edge, hence fall back to testing all edges
+                return _winding_number(x, y, edges)
+            # crossing an edge from its left to its right side leaves the
+            # area it winds around counter-clockwise
+            winding += -1 if begin > 0 else 1
+        return winding
+
+    @property
+    def polygon(self):
+        """
+        The polygon's vertices as tuple of `(x, y)` tuples.
+
+        :rtype: tuple
+        """
+        return self._prepared.polygon
+
+    @property
+    def bounds(self):
+        """
+        The polygon's bounds as `(minx, miny, maxx, maxy)`.
+
+        :rtype: tuple
+        """
+        return self._prepared.bounds
+
+    def classify(self, x, y):
+        """
+        Classify the given `x`/`y` coordinate as :data:`INSIDE`, on the
+        :data:`BOUNDARY` or :data:`OUTSIDE` of the polygon, see
+        :func:`.classify`.
+
+        :rtype: int
+        """
+        minx, miny, maxx, maxy = self._prepared.bounds
+        if not (minx <= x <= maxx and miny <= y <= maxy):
+            return OUTSIDE
+
+        column, row = self._cell(x, y)
+        index = row * self._size + column
+        winding = self._centres[index]
+        indices = self._cells[index]
+        if winding is None:
+            return self._prepared.classify(x, y)
+        if indices:
+            winding = self._walk(minx + (column + 0.5) * self._cellwidth,
+                                 miny + (row + 0.5) * self._cellheight,
+                                 x, y, winding, indices)
+            if winding is None:
+                return BOUNDARY
+        return INSIDE if winding else OUTSIDE
+
+    def contains(self, x, y):
+        """
+        Check if the given `x`/`y` coordinate is on the polygon.
+
+        :rtype: bool
+        """
+        return self.classify(x, y) != OUTSIDE
+
+    def __repr__(self):
+        return "GridPolygon(%r, size=%d)" % (self._prepared.polygon,
+                                             self._size)
+
+
+class MultiPolygon(object):
+    """
+    Contains `parts`, each one a tuple of an exterior ring and a tuple of
+    interior rings, ie. the holes of lakes and enclaves.  Rings are given as
+    tuples of vertices, or as :class:`.PreparedPolygon` or
+    :class:`.GridPolygon` for large rings:
+
+        >>> island = ((4.0, 0.0), (5.0, 0.0), (5.0, 1.0), (4.0, 1.0))
+        >>> land = ((0.0, 0.0), (3.0, 0.0), (3.0, 3.0), (0.0, 3.0))
+        >>> lake = ((1.0, 1.0), (2.0, 1.0), (2.0, 2.0), (1.0, 2.0))
+        >>> polygon = MultiPolygon([(land, [lake]), (island, [])])
+
+        >>> polygon.bounds
+        (0.0, 0.0, 5.0, 3.0)
+
+        >>> polygon.contains(0.5, 0.5), polygon.contains(4.5, 0.5)
+        (True, True)
+
+        >>> polygon.contains(1.5, 1.5), polygon.contains(3.5, 0.5)
+        (False, False)
+
+        >>> polygon.classify(1.0, 1.5) == BOUNDARY
+        True
+
+    The bounds of each part are tested first, hence a coordinate is tested
+    against the rings of the parts around it only.  Multipolygons offer the
+    same methods as :class:`.PreparedPolygon`, hence they can be used
+    wherever a prepared polygon is used.
+
+    Beware:
+        - latitude is `y` and longitude is `x`
+        - coordinate and rings must use the same geodesic projection system
+    """
 
-    return False
+    __slots__ = ("_parts", "_bounds")
+
+    def __init__(self, parts):
+        self._parts = tuple(
+            (self._prepare(exterior),
+             tuple(self._prepare(hole) for hole in holes))
+            for exterior, holes in parts
+        )
+        if not self._parts:
+            raise ValueError("parts must not be empty")
+        bounds = [exterior.bounds for exterior, _ in self._parts]
+        self._bounds = (min(box[0] for box in bounds),
+                        min(box[1] for box in bounds),
+                        max(box[2] for box in bounds),
+                        max(box[3] for box in bounds))
+
+    @staticmethod
+    def _prepare(ring):
+        if isinstance(ring, (PreparedPolygon, GridPolygon)):
+            return ring
+        return PreparedPolygon(ring)
+
+    @classmethod
+    def from_geojson(cls, geometry):
+        """
+        Create a multipolygon from a GeoJSON `geometry` of type `Polygon` or
+        `MultiPolygon`, given as dictionary.
+
+            >>> MultiPolygon.from_geojson({
+            ...     'type': 'Polygon',
+            ...     'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 0]]]})
+            MultiPolygon((((0, 0), (1, 0), (1, 1)), ()))
+
+        :rtype: :class:`.MultiPolygon`
+        """
+        if geometry['type'] == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry['type'] == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            raise ValueError(
+                "geometry has an unsupported type: %r; use Polygon or "
+                "MultiPolygon" % geometry['type'])
+
+        def _ring(positions):
+            ring = tuple((position[0], position[1]) for position in positions)
+            # GeoJSON repeats the first position at the end of a ring
+            return ring[:-1] if len(ring) > 1 and ring[0] == ring[-1] else ring
+
+        return cls((_ring(rings[0]), [_ring(ring) for ring in rings[1:]])
+                   for rings in polygons)
+
+    @property
+    def parts(self):
+        """
+        The parts as tuples of the prepared exterior ring and the prepared
+        interior rings.
+
+        :rtype: tuple
+        """
+        return self._parts
+
+    @property
+    def bounds(self):
+        """
+        The multipolygon's bounds as `(minx, miny, maxx, maxy)`.
+
+        :rtype: tuple
+        """
+        return self._bounds
+
+    def classify(self, x, y):
+        """
+        Classify the given `x`/`y` coordinate as :data:`INSIDE`, on the
+        :data:`BOUNDARY` or :data:`OUTSIDE` of the multipolygon.  Coordinates
+        within holes are outside, coordinates on the rings of holes are on the
+        boundary.
+
+        :rtype: int
+        """
+        minx, miny, maxx, maxy = self._bounds
+        if not (minx <= x <= maxx and miny <= y <= maxy):
+            return OUTSIDE
+
+        result = OUTSIDE
+        for exterior, holes in self._parts:
+            # the exterior's classify tests its bounds first
+            part = exterior.classify(x, y)
+            if part == OUTSIDE:
+                continue
+            for hole in holes:
+                inner = hole.classify(x, y)
+                if inner == INSIDE:
+                    part = OUTSIDE
+                    break
+                if inner == BOUNDARY:
+                    part = BOUNDARY
+            if part == INSIDE:
+                return INSIDE
+            result = max(result, part)
+        return result
+
+    def contains(self, x, y):
+        """
+        Check if the given `x`/`y` coordinate is on the multipolygon.
+
+        :rtype: bool
+        """
+        return self.classify(x, y) != OUTSIDE
+
+    def __repr__(self):
+        return "MultiPolygon(%s)" % ", ".join(
+            repr((exterior.polygon, tuple(hole.polygon for hole in holes)))
+            for exterior, holes in self._parts
+        )
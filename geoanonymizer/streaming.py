@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+"""
+Functions to mask streams of geocoded records with bounded memory.
+
+Records are read in chunks of `chunksize` records.  Each chunk is a tuple of
+the raw records and an array of their coordinates, as expected by the
+functions in :mod:`geoanonymizer.spatial.batch.mask`.  Every chunk is masked
+and written before the next chunk is read, hence memory usage depends on the
+`chunksize` only, not on the size of the input.
+
+Supported formats are CSV with a header row, and newline-delimited GeoJSON
+with one `Feature` of a `Point` geometry per line.
+"""
+
+import csv
+import itertools
+import json
+import numpy
+
+from geoanonymizer.parallel import (
+    _mask_coordinates, _masked_chunk, mask_in_parallel
+)
+
+
+def _chunked(iterable, chunksize):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _chunk_generator(generator, index):
+    # Streams with substreams get an independent substream per chunk, so the
+    # results do not depend on how the chunks are distributed among workers.
+    if hasattr(generator, 'substream'):
+        return generator.substream(index)
+    return generator
+
+
+def _columns(header, latitude, longitude, altitude):
+    names = [latitude, longitude]
+    if altitude is not None:
+        names.append(altitude)
+    for name in names:
+        if name not in header:
+            raise ValueError(
+                "column %r is missing from the header %r" % (name, header))
+    return [header.index(name) for name in names]
+
+
+def read_csv(source, latitude='latitude', longitude='longitude',
+             altitude=None, chunksize=10000, **fmtparams):
+    """
+    Read chunks of `(header, rows, coordinates)` from the CSV `source`.  The
+    column names of the coordinates are given by `latitude`, `longitude` and
+    the optional `altitude`.  Additional keyword arguments are passed to
+    :func:`csv.reader`.
+
+        >>> import io
+        >>> source = io.StringIO(u'id,latitude,longitude\\n1,1.5,2.5\\n')
+        >>> for header, rows, coordinates in read_csv(source):
+        ...     print(header, rows, coordinates.tolist())
+        ['id', 'latitude', 'longitude'] [['1', '1.5', '2.5']] [[1.5, 2.5]]
+
+    Blank lines are skipped.  A source with a header only yields a single
+    chunk without rows, an empty source yields no chunks at all:
+
+        >>> source = io.StringIO(u'id,latitude,longitude\\n1,1.5,2.5\\n\\n')
+        >>> [len(rows) for header, rows, coordinates in read_csv(source)]
+        [1]
+
+    A header without the columns of the coordinates raises a ValueError:
+
+        >>> next(read_csv(io.StringIO(u'lat,lon\\n')))
+        Traceback (most recent call last):
+        ...
+        ValueError: column 'latitude' is missing from the header ['lat', 'lon']
+    """
+    reader = csv.reader(source, **fmtparams)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _columns(header, latitude, longitude, altitude)
+
+    empty = True
+    for rows in _chunked((row for row in reader if row), chunksize):
+        coordinates = numpy.array(
+            [[row[column] for column in columns] for row in rows],
+            dtype=numpy.float64
+        )
+        empty = False
+        yield header, rows, coordinates
+
+    if empty:
+        # a chunk without rows still carries the header to the writer
+        yield header, [], numpy.empty((0, len(columns)), dtype=numpy.float64)
+
+
+def write_csv(target, chunks, latitude='latitude', longitude='longitude',
+              altitude=None, **fmtparams):
+    """
+    Write chunks of `(header, rows, coordinates)` to the CSV `target`, while
+    replacing the coordinate columns of each row with the given coordinates.
+    Additional keyword arguments are passed to :func:`csv.writer`.  Returns
+    the amount of rows written.
+    """
+    writer = csv.writer(target, **fmtparams)
+    count = 0
+    columns = None
+    for header, rows, coordinates in chunks:
+        if columns is None:
+            writer.writerow(header)
+            columns = _columns(header, latitude, longitude, altitude)
+        if len(rows) != len(coordinates):
+            raise ValueError(
+                "chunk has %d rows, but %d coordinates" %
+                (len(rows), len(coordinates)))
+        for row, values in zip(rows, coordinates.tolist()):
+            for column, value in zip(columns, values):
+                row[column] = repr(value)
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+def read_geojson(source, altitude=False, chunksize=10000):
+    """
+    Read chunks of `(features, coordinates)` from the newline-delimited
+    GeoJSON `source`.  If `altitude` is true, the third position of each
+    point is read too.
+
+        >>> import io
+        >>> source = io.StringIO(
+        ...     u'{"type": "Feature", "properties": {}, "geometry": '
+        ...     u'{"type": "Point", "coordinates": [2.5, 1.5]}}\\n')
+        >>> for features, coordinates in read_geojson(source):
+        ...     print(coordinates.tolist())
+        [[1.5, 2.5]]
+
+    Beware that GeoJSON positions are given as longitude and latitude, while
+    the returned coordinates are latitude and longitude.
+    """
+    size = 3 if altitude else 2
+    lines = (line for line in source if line.strip())
+
+    for lines in _chunked(lines, chunksize):
+        features = [json.loads(line) for line in lines]
+        coordinates = numpy.empty((len(features), size), dtype=numpy.float64)
+        for index, feature in enumerate(features):
+            geometry = feature['geometry']
+            if geometry['type'] != 'Point':
+                raise ValueError(
+                    "geometry has an unsupported type: %r; use 'Point'" %
+                    geometry['type']
+                )
+            position = geometry['coordinates']
+            # beware that longitude is x and latitude is y !
+            coordinates[index, 0] = position[1]
+            coordinates[index, 1] = position[0]
+            if altitude:
+                coordinates[index, 2] = position[2]
+        yield features, coordinates
+
+
+def write_geojson(target, chunks):
+    """
+    Write chunks of `(features, coordinates)` to the newline-delimited GeoJSON
+    `target`, while replacing the position of each feature with the given
+    coordinates.  Returns the amount of features written.
+    """
+    count = 0
+    for features, coordinates in chunks:
+        if len(features) != len(coordinates):
+            raise ValueError(
+                "chunk has %d features, but %d coordinates" %
+                (len(features), len(coordinates)))
+        for feature, values in zip(features, coordinates.tolist()):
+            # beware that longitude is x and latitude is y !
+            values[0], values[1] = values[1], values[0]
+            feature['geometry']['coordinates'] = values
+            target.write(json.dumps(feature, separators=(',', ':')))
+            target.write('\n')
+        count += len(features)
+    return count
+
+
+def mask_chunks(chunks, mask, precisions=None, generator=None):
+    """
+    Apply the `mask` function to the coordinates of each chunk, and limit the
+    masked coordinates to the given `precisions`, if any.  The `mask` must be
+    one of the functions in :mod:`geoanonymizer.spatial.batch.mask` or have the
+    same signature, use :func:`functools.partial` to configure it.
+
+    If the `generator` is a :class:`geoanonymizer.randomstream.RandomStream`,
+    each chunk is masked with the substream of the chunk's index, hence the
+    result is reproducible, independent of how the chunks are processed.
+
+    If the `mask` returns a tuple of the masked coordinates and a boolean
+    array of the accepted ones, like
+    :meth:`geoanonymizer.spatial.batch.pipeline.Pipeline.apply`, the rejected
+    records are dropped from the chunk:
+
+        >>> from geoanonymizer.spatial.batch.pipeline import Pipeline
+        >>> pipeline = Pipeline().filter(
+        ...     lambda coordinates: coordinates[:, 0] > 0.0)
+        >>> chunks = [(['a', 'b', 'c'], numpy.array(
+        ...     [[1.0, 1.0], [-1.0, 2.0], [3.0, 3.0]]))]
+        >>> for records, coordinates in mask_chunks(chunks, pipeline.apply):
+        ...     print(records, coordinates.tolist())
+        ['a', 'c'] [[1.0, 1.0], [3.0, 3.0]]
+
+    """
+    for index, chunk in enumerate(chunks):
+        coordinates, accepted = _mask_coordinates(
+            chunk[-1], mask, precisions,
+            None if generator is None else _chunk_generator(generator, index)
+        )
+        yield _masked_chunk(chunk, coordinates, accepted)
+
+
+def _mask_chunks(chunks, mask, precisions, generator, processes,
+                 throughput):
+    if processes is None:
+        return mask_chunks(chunks, mask, precisions, generator)
+    return mask_in_parallel(chunks, mask, precisions, generator, processes,
+                            throughput)
+
+
+def mask_csv(source, target, mask, precisions=None, generator=None,
+             latitude='latitude', longitude='longitude', altitude=None,
+             chunksize=10000, processes=None, throughput=None,
+             **fmtparams):
+    """
+    Mask the CSV `source` and write the result to the CSV `target`, chunk by
+    chunk.  Returns the amount of rows written.  If the amount of `processes`
+    is given, the chunks are masked by
+    :func:`geoanonymizer.parallel.mask_in_parallel`, recording the work of
+    each worker in the given
+    :class:`geoanonymizer.parallel.Throughput`, if any.
+
+        >>> import io, functools
+        >>> from geoanonymizer.spatial.batch.mask import add_vector
+        >>> source = io.StringIO(u'id,latitude,longitude\\n1,1.234,2.346\\n')
+        >>> target = io.StringIO()
+        >>> mask_csv(source, target,
+        ...          functools.partial(add_vector, vector=(1.0, 1.0, None)),
+        ...          precisions=(2, 2, None))
+        1
+
+        >>> target.getvalue().splitlines()
+        ['id,latitude,longitude', '1,2.23,3.35']
+
+    The header is written even if the `source` has no rows:
+
+        >>> source = io.StringIO(u'id,latitude,longitude\\n')
+        >>> target = io.StringIO()
+        >>> mask_csv(source, target, add_vector)
+        0
+
+        >>> target.getvalue().splitlines()
+        ['id,latitude,longitude']
+
+    """
+    chunks = read_csv(source, latitude, longitude, altitude, chunksize,
+                      **fmtparams)
+    chunks = _mask_chunks(chunks, mask, precisions, generator, processes,
+                          throughput)
+    return write_csv(target, chunks, latitude, longitude, altitude,
+                     **fmtparams)
+
+
+def mask_geojson(source, target, mask, precisions=None, generator=None,
+                 altitude=False, chunksize=10000, processes=None,
+                 throughput=None):
+    """
+    Mask the newline-delimited GeoJSON `source` and write the result to the
+    newline-delimited GeoJSON `target`, chunk by chunk.  Returns the amount of
+    features written.  If the amount of `processes` is given, the chunks are
+    masked by :func:`geoanonymizer.parallel.mask_in_parallel`, recording the
+    work of each worker in the given
+    :class:`geoanonymizer.parallel.Throughput`, if any.
+    """
+    chunks = read_geojson(source, altitude, chunksize)
+    chunks = _mask_chunks(chunks, mask, precisions, generator, processes,
+                          throughput)
+    return write_geojson(target, chunks)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""
+:class:`.Trajectory` represents a sequence of points in time.
+"""
+
+import numpy
+
+from geoanonymizer.spatial.coordinate import Coordinate
+from geoanonymizer.trajectory.TrajectoryPoint import TrajectoryPoint
+
+
+class Trajectory(object):
+    """
+    Contains the timestamps of a trajectory in one array and its locations
+    in an array of (latitude, longitude, altitude) rows, hence a trajectory
+    of a million points costs a few arrays instead of millions of objects:
+
+        >>> trajectory = Trajectory([1.0, 2.0], [[52.0, 13.0, 0.0],
+        ...                                      [52.1, 13.1, 0.0]])
+        >>> trajectory
+        Trajectory(2)
+
+        >>> trajectory.latitudes.tolist()
+        [52.0, 52.1]
+
+    Iterating and indexing yields :class:`.TrajectoryPoint` instances created
+    on demand, with their locations given as
+    :class:`geoanonymizer.spatial.coordinate.Coordinate`, while slicing
+    yields trajectories sharing the arrays:
+
+        >>> trajectory[1]
+        TrajectoryPoint(2.0, (52.1, 13.1, 0.0))
+
+        >>> [point.timestamp for point in trajectory]
+        [1.0, 2.0]
+
+        >>> trajectory[1:].coordinates.base is not None
+        True
+
+    The coordinates can be masked as a whole by any function of
+    :mod:`geoanonymizer.spatial.batch.mask`:
+
+        >>> from geoanonymizer.spatial.batch.mask import displace_on_a_circle
+        >>> masked = trajectory.mask(displace_on_a_circle, radius=0.1)
+        >>> masked.timestamps is trajectory.timestamps
+        True
+
+    """
+
+    __slots__ = ("_timestamps", "_coordinates")
+
+    def __init__(self, timestamps, coordinates):
+        timestamps = numpy.asarray(timestamps, dtype=numpy.float64)
+        coordinates = numpy.asarray(coordinates, dtype=numpy.float64)
+        if coordinates.ndim != 2 or coordinates.shape[1] != 3:
+            raise ValueError(
+                "coordinates must have a shape of (n, 3), got %r" %
+                (coordinates.shape,))
+        if timestamps.shape != (len(coordinates),):
+            raise ValueError(
+                "timestamps must have a shape of (%d,), got %r" %
+                (len(coordinates), timestamps.shape))
+        self._timestamps = timestamps
+        self._coordinates = coordinates
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        Create a trajectory from :class:`.TrajectoryPoint` instances, or any
+        iterable of `(timestamp, (latitude, longitude, altitude))`.
+
+            >>> Trajectory.from_points([TrajectoryPoint(1.0, (52.0, 13.0))])
+            Trajectory(1)
+
+        :rtype: :class:`.Trajectory`
+        """
+        timestamps, coordinates = [], []
+        for timestamp, location in points:
+            timestamps.append(timestamp)
+            coordinates.append(tuple(location))
+        if not coordinates:
+            return cls(numpy.empty(0), numpy.empty((0, 3)))
+        return cls(timestamps, coordinates)
+
+    @property
+    def timestamps(self):
+        """
+        The timestamps.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._timestamps
+
+    @property
+    def coordinates(self):
+        """
+        The locations as rows of latitude, longitude and altitude.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._coordinates
+
+    @property
+    def latitudes(self):
+        """
+        The locations' latitudes.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._coordinates[:, 0]
+
+    @property
+    def longitudes(self):
+        """
+        The locations' longitudes.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._coordinates[:, 1]
+
+    @property
+    def altitudes(self):
+        """
+        The locations' altitudes.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        return self._coordinates[:, 2]
+
+    def mask(self, function, **kwargs):
+        """
+        Return a trajectory with the same timestamps and the coordinates
+        masked by the given `function` of
+        :mod:`geoanonymizer.spatial.batch.mask` with the given `kwargs`.
+
+        :rtype: :class:`.Trajectory`
+        """
+        return Trajectory(self._timestamps,
+                          function(self._coordinates, **kwargs))
+
+    def sorted(self):
+        """
+        Return a trajectory with the points ordered by their timestamps.
+
+        :rtype: :class:`.Trajectory`
+        """
+        order = numpy.argsort(self._timestamps, kind='stable')
+        return Trajectory(self._timestamps[order], self._coordinates[order])
+
+    def between(self, start, stop):
+        """
+        Return the points with timestamps from `start` up to, but excluding,
+        `stop` as a trajectory sharing the arrays.  The timestamps must be
+        sorted.
+
+        :rtype: :class:`.Trajectory`
+        """
+        first, last = self._timestamps.searchsorted((start, stop))
+        return self[first:last]
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Trajectory(self._timestamps[index],
+                              self._coordinates[index])
+        latitude, longitude, altitude = self._coordinates[index].tolist()
+        return TrajectoryPoint(float(self._timestamps[index]),
+                               Coordinate(latitude, longitude, altitude))
+
+    def __iter__(self):
+        for timestamp, (latitude, longitude, altitude) in zip(
+                self._timestamps.tolist(), self._coordinates.tolist()):
+            yield TrajectoryPoint(timestamp,
+                                  Coordinate(latitude, longitude, altitude))
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Trajectory) and
+            numpy.array_equal(self._timestamps, other._timestamps) and
+            numpy.array_equal(self._coordinates, other._coordinates)
+        )
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "Trajectory(%d)" % len(self)
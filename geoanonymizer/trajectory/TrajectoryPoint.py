@@ -5,7 +5,12 @@
 """
 
 from geopy.point import Point
-from geopy.compat import string_compare, py3k
+from geoanonymizer.spatial.coordinate import Coordinate
+
+try:
+    from geopy.compat import string_compare
+except ImportError:  # geopy >= 2.0 dropped python 2 support
+    string_compare = str
 
 
 class TrajectoryPoint(object):  # pylint: disable=R0903,R0921
@@ -14,27 +19,90 @@ class TrajectoryPoint(object):  # pylint: disable=R0903,R0921
     (timestamp<float>, (latitude<float>, longitude<float>, altitude<float>)).
     Or one can access the properties `timestamp`, `latitude`, `longitude` or
     `altitude`.
+
+    The location is held as
+    :class:`geoanonymizer.spatial.coordinate.Coordinate` of plain floats, a
+    location given as coordinate is kept as is.  The
+    :class:`geopy.point.Point` and the tuple to iterate over are created when
+    needed only:
+
+        >>> location = Coordinate(12.3456, 12.3456, 12.3456)
+        >>> trajectory_point = TrajectoryPoint(1.0, location)
+        >>> trajectory_point
+        TrajectoryPoint(1.0, (12.3456, 12.3456, 12.3456))
+
+        >>> trajectory_point.coordinate is location
+        True
+
+        >>> trajectory_point.point
+        Point(12.3456, 12.3456, 12.3456)
+
+    Locations given as tuples or lists are normalized like
+    :class:`geopy.point.Point` does, without creating one:
+
+        >>> TrajectoryPoint(1.0, (112.3456, 12.3456))
+        TrajectoryPoint(1.0, (-67.65440000000001, 12.3456, 0.0))
+
     """
 
     __slots__ = ("_timestamp", "_point", "_tuple", "_raw")
 
     def __init__(self, timestamp=None, point=None):
         self._timestamp = timestamp
+        self._point = None
+        self._tuple = None
         if point is None:
-            self._point = (None, None, None)
-        elif isinstance(point, Point):
-            self._point = point
-        elif isinstance(point, string_compare):
-            self._point = Point(point)
-        elif isinstance(point, (tuple, list)):
-            self._point = Point(point)
+            self._raw = None
+        elif isinstance(point, Coordinate):
+            self._raw = point
+        elif isinstance(point, (tuple, list)) and 2 <= len(point) <= 3:
+            self._raw = Coordinate.normalized(
+                float(point[0]), float(point[1]),
+                float(point[2] or 0.0) if len(point) == 3 else 0.0)
+        elif isinstance(point, (Point, string_compare, tuple, list)):
+            self._point = point = Point(point)
+            self._raw = Coordinate.from_point(point)
         else:
             raise TypeError(
-                "point an unsupported type: %r; use %r or Point",
-                type(point), type(string_compare)
+                "point has an unsupported type: %r; use %r, tuple, list, "
+                "Coordinate or Point" % (type(point), string_compare)
             )
-        self._tuple = (self._timestamp,
-                       (self._point[0], self._point[1], self._point[2]))
+
+    @classmethod
+    def from_arrays(cls, timestamps, latitudes, longitudes, altitudes=None):
+        """
+        Create a list of trajectory points from sequences or arrays of
+        `timestamps`, `latitudes`, `longitudes` and `altitudes`, which are
+        taken as given, without normalizing them.
+
+            >>> TrajectoryPoint.from_arrays([1.0, 2.0], [52.0, 52.1],
+            ...                             [13.0, 13.1])
+            [TrajectoryPoint(1.0, (52.0, 13.0, 0.0)), \
+TrajectoryPoint(2.0, (52.1, 13.1, 0.0))]
+
+        :rtype: list
+        """
+        def _values(values):
+            return values.tolist() if hasattr(values, 'tolist') else values
+
+        latitudes = _values(latitudes)
+        if altitudes is None:
+            altitudes = [0.0] * len(latitudes)
+
+        # bypass __init__ and the coordinate's __new__, which only dispatch
+        points = []
+        new = object.__new__
+        new_tuple = tuple.__new__
+        for timestamp, location in zip(
+                _values(timestamps),
+                zip(latitudes, _values(longitudes), _values(altitudes))):
+            trajectory_point = new(cls)
+            trajectory_point._timestamp = timestamp
+            trajectory_point._raw = new_tuple(Coordinate, location)
+            trajectory_point._point = None
+            trajectory_point._tuple = None
+            points.append(trajectory_point)
+        return points
 
     @property
     def timestamp(self):
@@ -52,7 +120,7 @@ class TrajectoryPoint(object):  # pylint: disable=R0903,R0921
 
         :rtype: float or None
         """
-        return self._point[0]
+        return self._raw[0] if self._raw is not None else None
 
     @property
     def longitude(self):
@@ -61,7 +129,7 @@ class TrajectoryPoint(object):  # pylint: disable=R0903,R0921
 
         :rtype: float or None
         """
-        return self._point[1]
+        return self._raw[1] if self._raw is not None else None
 
     @property
     def altitude(self):
@@ -70,23 +138,42 @@ class TrajectoryPoint(object):  # pylint: disable=R0903,R0921
 
         :rtype: float or None
         """
-        return self._point[2]
+        return self._raw[2] if self._raw is not None else None
 
     @property
     def point(self):
         """
         :class:`geopy.point.Point` instance representing the location's
-        latitude, longitude, and altitude.
+        latitude, longitude, and altitude, created on the first access.
 
         :rtype: :class:`geopy.point.Point` or None
         """
-        return self._point if self._point != (None, None, None) else None
+        if self._point is None and self._raw is not None:
+            self._point = self._raw.to_point()
+        return self._point
+
+    @property
+    def coordinate(self):
+        """
+        :class:`geoanonymizer.spatial.coordinate.Coordinate` instance
+        representing the location's latitude, longitude, and altitude.
+
+        :rtype: :class:`geoanonymizer.spatial.coordinate.Coordinate` or None
+        """
+        return self._raw
+
+    def _get_tuple(self):
+        if self._tuple is None:
+            self._tuple = (self._timestamp,
+                           tuple(self._raw) if self._raw is not None
+                           else (None, None, None))
+        return self._tuple
 
     def __getitem__(self, index):
         """
         Backwards compatibility with geopy<0.98 tuples.
         """
-        return self._tuple[index]
+        return self._get_tuple()[index]
 
     def __repr__(self):
         return "TrajectoryPoint(%s, (%s, %s, %s))" % (
@@ -98,17 +185,17 @@ class TrajectoryPoint(object):  # pylint: disable=R0903,R0921
     __str__ = __unicode__
 
     def __iter__(self):
-        return iter(self._tuple)
+        return iter(self._get_tuple())
 
     def __eq__(self, other):
         return (
             isinstance(other, TrajectoryPoint) and
             self._timestamp == other._timestamp and  # pylint: disable=W0212
-            self._point == other._point
+            self._raw == other._raw  # pylint: disable=W0212
         )
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __len__(self):  # pragma: no cover
-        return len(self._tuple)
+        return 2
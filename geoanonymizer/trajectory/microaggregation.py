@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+Partition trajectories into clusters of k to 2k − 1 similar trajectories, as
+needed by
+:func:`geoanonymizer.trajectory.permutation.permutate_swap_locations`, using
+the Maximum Distance to Average Vector (MDAV) microaggregation heuristic
+described in `Practical data-oriented microaggregation for
+statistical disclosure control
+<https://doi.org/10.1109/TKDE.2002.1033770>`_
+"""
+
+import numpy
+
+from geoanonymizer.trajectory.Trajectory import Trajectory
+
+
+def _squared_distances(points, point):
+    difference = points - point
+    return numpy.einsum('ij,ij->i', difference, difference)
+
+
+def _nearest(points, point, cardinality):
+    distances = _squared_distances(points, point)
+    return numpy.argpartition(distances, cardinality - 1)[:cardinality]
+
+
+def _mdav(points, cardinality):
+    remaining = numpy.arange(len(points))
+    clusters = []
+
+    def take(point):
+        nearest = _nearest(points[remaining], point, cardinality)
+        clusters.append(remaining[nearest])
+        return numpy.delete(remaining, nearest)
+
+    while len(remaining) >= 3 * cardinality:
+        subset = points[remaining]
+        centroid = subset.mean(axis=0)
+        first = subset[numpy.argmax(_squared_distances(subset, centroid))]
+        second = subset[numpy.argmax(_squared_distances(subset, first))]
+        remaining = take(first)
+        remaining = take(second)
+
+    if len(remaining) >= 2 * cardinality:
+        subset = points[remaining]
+        centroid = subset.mean(axis=0)
+        remaining = take(
+            subset[numpy.argmax(_squared_distances(subset, centroid))])
+    if len(remaining):
+        clusters.append(remaining)
+    return clusters
+
+
+def _partition(points, leafsize):
+    # split at the median of the widest dimension, like a kd-tree
+    stack = [numpy.arange(len(points))]
+    while stack:
+        indices = stack.pop()
+        if len(indices) <= leafsize:
+            yield indices
+            continue
+        subset = points[indices]
+        dimension = numpy.argmax(subset.max(axis=0) - subset.min(axis=0))
+        middle = len(indices) // 2
+        order = numpy.argpartition(subset[:, dimension], middle)
+        stack.append(indices[order[middle:]])
+        stack.append(indices[order[:middle]])
+
+
+def mdav(points, cardinality, leafsize=1024):
+    """
+    Partition the given `points`, an array of n vectors, into clusters of
+    `cardinality` k up to 2k − 1 points, and return the indices of each
+    cluster.  MDAV repeatedly takes the point farthest from the centroid of
+    the remaining points and the point farthest from that one, and clusters
+    each with its k − 1 nearest remaining points:
+
+        >>> points = [[0.0, 0.0], [0.0, 1.0], [9.0, 9.0], [1.0, 0.0],
+        ...           [9.0, 8.0], [8.0, 9.0], [5.0, 5.0]]
+        >>> sorted(sorted(cluster.tolist()) for cluster in mdav(points, 3))
+        [[0, 1, 3], [2, 4, 5, 6]]
+
+    The distances are computed from one point to all remaining points at
+    once, instead of holding a matrix of all distances, hence the effort
+    grows with n² / k.  Larger inputs are therefore first split at the median
+    of their widest dimension, like a kd-tree, into leaves of at most
+    `leafsize` points, and each leaf is clustered on its own, which reduces
+    the effort to n times `leafsize` / k.  The result is only approximately
+    MDAV then, since points on either side of a split never share a
+    cluster.  Give a `leafsize` of None for exact MDAV over all points.
+    """
+    points = numpy.asarray(points, dtype=numpy.float64)
+    if points.ndim == 1:
+        points = points.reshape(-1, 1)
+    cardinality = int(cardinality)
+    if cardinality < 1:
+        raise ValueError(
+            "cardinality must be at least 1, got %r" % cardinality)
+    if len(points) < cardinality:
+        raise ValueError("at least %d points are needed, got %d" %
+                         (cardinality, len(points)))
+    if leafsize is None:
+        leaves = [numpy.arange(len(points))]
+    else:
+        leaves = _partition(points, max(leafsize, 2 * cardinality))
+
+    clusters = []
+    for indices in leaves:
+        clusters.extend(indices[cluster]
+                        for cluster in _mdav(points[indices], cardinality))
+    return clusters
+
+
+def _features(trajectory, samples):
+    if not isinstance(trajectory, Trajectory):
+        trajectory = Trajectory.from_points(trajectory)
+    if not len(trajectory):
+        raise ValueError("trajectories must have at least one point")
+    trajectory = trajectory.sorted()
+    timestamps = trajectory.timestamps
+    times = numpy.linspace(timestamps[0], timestamps[-1], samples)
+    return numpy.concatenate((
+        numpy.interp(times, timestamps, trajectory.latitudes),
+        numpy.interp(times, timestamps, trajectory.longitudes),
+    ))
+
+
+def microaggregate(trajectories, cardinality, samples=8, leafsize=1024):
+    """
+    Partition the given `trajectories`, each one a
+    :class:`geoanonymizer.trajectory.Trajectory.Trajectory` or a sequence of
+    :class:`geoanonymizer.trajectory.TrajectoryPoint.TrajectoryPoint`, into
+    clusters of `cardinality` k up to 2k − 1 trajectories by :func:`.mdav`.
+
+    Each trajectory is compared by its locations at `samples` equally spaced
+    moments from its first to its last timestamp, interpolated linearly,
+    hence the coordinates should be projected into a metric system.  The
+    `leafsize` is passed on to :func:`.mdav`, hence the clusters of more than
+    `leafsize` trajectories are only approximately MDAV:
+
+        >>> from geoanonymizer.trajectory.TrajectoryPoint import (
+        ...     TrajectoryPoint)
+        >>> trajectories = [
+        ...     [TrajectoryPoint(0.0, (0.0, 0.0)),
+        ...      TrajectoryPoint(9.0, (1.0, 1.0))],
+        ...     [TrajectoryPoint(5.0, (0.0, 0.1)),
+        ...      TrajectoryPoint(7.0, (1.0, 1.1))],
+        ...     [TrajectoryPoint(1.0, (9.0, 9.0))],
+        ...     [TrajectoryPoint(1.0, (9.0, 8.0)),
+        ...      TrajectoryPoint(2.0, (9.0, 8.1))],
+        ... ]
+        >>> sorted(sorted(trajectories.index(trajectory)
+        ...               for trajectory in cluster)
+        ...        for cluster in microaggregate(trajectories, 2))
+        [[0, 1], [2, 3]]
+
+    Each cluster is a tuple of trajectories, to be passed on like
+    `permutate_swap_locations(k, *cluster)`, also if it holds more than k
+    trajectories:
+
+        >>> from geoanonymizer.trajectory.permutation import (
+        ...     permutate_swap_locations)
+        >>> trajectories.append([TrajectoryPoint(3.0, (0.1, 0.0))])
+        >>> clusters = microaggregate(trajectories, 2)
+        >>> sorted(len(cluster) for cluster in clusters)
+        [2, 3]
+        >>> cluster = max(clusters, key=len)
+        >>> swapped = permutate_swap_locations(
+        ...     2, *cluster, time_threshold=10.0, space_threshold=2.0)
+        >>> len(swapped), sum(len(trajectory) for trajectory in swapped)
+        (3, 4)
+
+    :rtype: list
+    """
+    trajectories = list(trajectories)
+    features = numpy.array([_features(trajectory, samples)
+                            for trajectory in trajectories])
+    return [tuple(trajectories[index] for index in cluster.tolist())
+            for cluster in mdav(features, cardinality, leafsize)]
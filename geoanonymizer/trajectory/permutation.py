@@ -6,8 +6,25 @@ Implement the two permutation-based methods `SwapLocations` and
 <https://www.unece.org/fileadmin/DAM/stats/documents/ece/ces/ge.46/2011/32_Domingo-Trujillo.pdf>`_
 """
 
+import random
 
-def permutate_swap_locations(cardinality=1.0, *cluster):
+from geoanonymizer.trajectory.TrajectoryPoint import TrajectoryPoint
+
+
+def _cell(timestamp, x, y, time_threshold, space_threshold):
+    return (int(timestamp // time_threshold), int(x // space_threshold),
+            int(y // space_threshold))
+
+
+def _neighbours(cell):
+    t, x, y = cell
+    for dt in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                yield t + dt, x + dx, y + dy
+
+
+def permutate_swap_locations(cardinality=1.0, *cluster, **kwargs):
     """
     This method needs sets of trajectories as clusters, partitioned using
     microaggregation.  Limit yourself to clustering algorithms which try
@@ -33,22 +50,136 @@ def permutate_swap_locations(cardinality=1.0, *cluster):
     then λ is removed; otherwise, random swaps of triples are performed within
     the formed cluster.  As a result, at least one of the trajectories returned
     by this function has all its triples swapped.
+
+    The trajectories of the `cluster` are sequences of
+    :class:`geoanonymizer.trajectory.TrajectoryPoint.TrajectoryPoint`, ie. a
+    :class:`geoanonymizer.trajectory.Trajectory.Trajectory`.  The thresholds
+    are given as keyword arguments `time_threshold` (Rt) and `space_threshold`
+    (Rs), the latter in the units of the coordinates, hence coordinates
+    should be projected into a metric system to use metres.  The `generator`
+    defaults to :mod:`random`:
+
+        >>> from geoanonymizer.trajectory.TrajectoryPoint import (
+        ...     TrajectoryPoint)
+        >>> cluster = [
+        ...     [TrajectoryPoint(0.0, (0.0, 0.0)),
+        ...      TrajectoryPoint(60.0, (1.0, 1.0))],
+        ...     [TrajectoryPoint(10.0, (0.0, 0.1))],
+        ...     [TrajectoryPoint(20.0, (0.1, 0.0)),
+        ...      TrajectoryPoint(70.0, (9.0, 9.0))],
+        ... ]
+        >>> swapped = permutate_swap_locations(
+        ...     3, *cluster, time_threshold=30.0, space_threshold=0.5)
+
+        >>> [[point.timestamp for point in trajectory]
+        ...  for trajectory in swapped]
+        [[0.0], [10.0], [20.0]]
+
+        >>> sorted(tuple(point.coordinate) for trajectory in swapped
+        ...        for point in trajectory)
+        [(0.0, 0.0, 0.0), (0.0, 0.1, 0.0), (0.1, 0.0, 0.0)]
+
+    The whole cluster is anonymized, also if its cardinality is not a
+    multiple of k, hence each triple is swapped with k − 1 triples of the
+    other trajectories, whichever fit best:
+
+        >>> cluster.append([TrajectoryPoint(15.0, (0.1, 0.1))])
+        >>> swapped = permutate_swap_locations(
+        ...     3, *cluster, time_threshold=30.0, space_threshold=0.5)
+        >>> len(swapped), sum(len(trajectory) for trajectory in swapped)
+        (4, 3)
+
+    The triples are bucketed into cells of Rt by Rs by Rs, hence the
+    candidates of a triple are looked up in the neighbouring cells only.
+
+    :rtype: tuple
     """
-    size = len(cluster)
-    overhead = (size % cardinality)
-    if overhead is 0:
-        overhead = []
-    else:
-        overhead = cluster[-1 * overhead:]
-        cluster = cluster[0:-1 * overhead]
+    time_threshold = kwargs.pop('time_threshold', 0.0)
+    space_threshold = kwargs.pop('space_threshold', 0.0)
+    generator = kwargs.pop('generator', random)
+    if kwargs:
+        raise TypeError(
+            "unexpected keyword arguments: %s" % ", ".join(sorted(kwargs)))
+
+    # cells of zero thresholds still bucket equal values together
+    time_cell = time_threshold or 1.0
+    space_cell = space_threshold or 1.0
+    partners = int(cardinality) - 1
+
+    timestamps, locations, done, buckets = [], [], [], {}
+    for trajectory, points in enumerate(cluster):
+        timestamps.append([])
+        locations.append([])
+        for point in points:
+            location = point.coordinate
+            if location is None:
+                continue
+            position = len(locations[trajectory])
+            timestamps[trajectory].append(point.timestamp)
+            locations[trajectory].append(location)
+            buckets.setdefault(_cell(
+                point.timestamp, location[1], location[0], time_cell,
+                space_cell), []).append((trajectory, position))
+        done.append([False] * len(locations[trajectory]))
+
+    kept = [[False] * len(trajectory) for trajectory in locations]
+    order = list(range(len(cluster)))
+    generator.shuffle(order)
 
-    # ... do something with the cluster here ...
-    raise NotImplementedError
+    for trajectory in order:
+        for position, location in enumerate(locations[trajectory]):
+            if done[trajectory][position]:
+                continue
+            done[trajectory][position] = True
+            timestamp = timestamps[trajectory][position]
+            x, y = location[1], location[0]
 
-    return (cluster, overhead)
+            # the nearest unswapped triple of each other trajectory
+            nearest = {}
+            for cell in _neighbours(_cell(timestamp, x, y, time_cell,
+                                          space_cell)):
+                for other, candidate in buckets.get(cell, ()):
+                    if other == trajectory or done[other][candidate]:
+                        continue
+                    if abs(timestamps[other][candidate] - timestamp) > \
+                            time_threshold:
+                        continue
+                    latitude, longitude = locations[other][candidate][:2]
+                    distance = (longitude - x) ** 2 + (latitude - y) ** 2
+                    if distance > space_threshold ** 2:
+                        continue
+                    if other not in nearest or distance < nearest[other][0]:
+                        nearest[other] = (distance, candidate)
 
+            if len(nearest) < partners:
+                # λ is removed
+                continue
 
-def permutate_reachable_locations():
+            members = [(trajectory, position)] + [
+                (other, candidate) for _, other, candidate in sorted(
+                    (distance, other, candidate)
+                    for other, (distance, candidate) in nearest.items()
+                )[:partners]
+            ]
+            swapped = [locations[other][candidate]
+                       for other, candidate in members]
+            generator.shuffle(swapped)
+            for (other, candidate), location in zip(members, swapped):
+                locations[other][candidate] = location
+                done[other][candidate] = True
+                kept[other][candidate] = True
+
+    cluster = tuple(
+        [TrajectoryPoint(timestamp, location) for timestamp, location, keep
+         in zip(timestamps[trajectory], locations[trajectory],
+                kept[trajectory]) if keep]
+        for trajectory in range(len(cluster))
+    )
+    return cluster
+
+
+def permutate_reachable_locations(cardinality, graph, *trajectories,
+                                  **kwargs):
     """
     This method takes reachability constraints into account: from a given
     location, only those locations at a distance below a threshold following a
@@ -79,6 +210,146 @@ def permutate_reachable_locations():
     the data set and will not be considered anymore in the subsequent
     anonymization.  This process continues until no more “unswapped” locations
     appear in the data set.
+
+    The paths are taken on the given `graph`, a
+    :class:`geoanonymizer.spatial.graph.RoadGraph`, with each location
+    snapped to its nearest node, hence Rs is a path length between these
+    nodes.  The `trajectories` are sequences of
+    :class:`geoanonymizer.trajectory.TrajectoryPoint.TrajectoryPoint`, the
+    thresholds are given as keyword arguments `time_threshold` (Rt) and
+    `space_threshold` (Rs), and the `generator` defaults to :mod:`random`:
+
+        >>> from geoanonymizer.spatial.graph import RoadGraph
+        >>> from geoanonymizer.trajectory.TrajectoryPoint import (
+        ...     TrajectoryPoint)
+        >>> graph = RoadGraph({1: (0.0, 0.0), 2: (1.0, 0.0), 3: (9.0, 0.0)},
+        ...                   [(1, 2, 1.0), (2, 1, 1.0)])
+        >>> trajectories = [
+        ...     [TrajectoryPoint(0.0, (0.0, 0.0)),
+        ...      TrajectoryPoint(9.0, (0.0, 9.0))],
+        ...     [TrajectoryPoint(5.0, (0.0, 1.0))],
+        ... ]
+        >>> anonymized = permutate_reachable_locations(
+        ...     2, graph, *trajectories, time_threshold=10.0,
+        ...     space_threshold=1.5)
+
+        >>> [[point.timestamp for point in trajectory]
+        ...  for trajectory in anonymized]
+        [[0.0], [5.0]]
+
+        >>> sorted(tuple(point.coordinate) for trajectory in anonymized
+        ...        for point in trajectory)
+        [(0.0, 0.0, 0.0), (0.0, 1.0, 0.0)]
+
+    The locations are bucketed by their node and timestamp, hence the
+    candidates of a location are looked up in the buckets of its reachable
+    nodes only, or in the buckets of its timestamp if these hold fewer.  The
+    cluster Cλ is approximated by λ and the nearest locations along the paths
+    of k − 1 other trajectories, and the locations are processed grouped by
+    their nodes in random order, hence the reachable nodes of each node are
+    searched once.
     """
-    raise NotImplementedError
-    pass
+    time_threshold = kwargs.pop('time_threshold', 0.0)
+    space_threshold = kwargs.pop('space_threshold', 0.0)
+    generator = kwargs.pop('generator', random)
+    if kwargs:
+        raise TypeError(
+            "unexpected keyword arguments: %s" % ", ".join(sorted(kwargs)))
+
+    time_cell = time_threshold or 1.0
+    partners = int(cardinality) - 1
+
+    # the states of the locations
+    unswapped, swapped, removed = 0, 1, 2
+
+    timestamps, locations, nodes, states = [], [], [], []
+    buckets, periods = {}, {}
+    for trajectory, points in enumerate(trajectories):
+        timestamps.append([])
+        locations.append([])
+        nodes.append([])
+        for point in points:
+            location = point.coordinate
+            if location is None:
+                continue
+            position = len(locations[trajectory])
+            node = graph.snap(location[1], location[0])
+            timestamps[trajectory].append(point.timestamp)
+            locations[trajectory].append(location)
+            nodes[trajectory].append(node)
+            cell = int(point.timestamp // time_cell)
+            buckets.setdefault((node, cell), []).append(
+                (trajectory, position))
+            periods.setdefault(cell, []).append((trajectory, position))
+        states.append([unswapped] * len(locations[trajectory]))
+
+    # locations of the same node in a row reuse its cached reachable nodes,
+    # hence the locations are shuffled within their nodes, and the nodes are
+    # shuffled themselves
+    groups = {}
+    for trajectory in range(len(trajectories)):
+        for position, node in enumerate(nodes[trajectory]):
+            groups.setdefault(node, []).append((trajectory, position))
+    for group in groups.values():
+        generator.shuffle(group)
+    order = list(groups)
+    generator.shuffle(order)
+    order = [location for node in order for location in groups[node]]
+
+    for trajectory, position in order:
+        if states[trajectory][position] != unswapped:
+            continue
+        timestamp = timestamps[trajectory][position]
+        cell = int(timestamp // time_cell)
+
+        # the nearest unswapped location of each other trajectory
+        nearest = {}
+        reachable = graph.reachable(nodes[trajectory][position],
+                                    space_threshold)
+        periods_size = sum(len(periods.get(cell + offset, ()))
+                           for offset in (-1, 0, 1))
+        if periods_size < 3 * len(reachable):
+            # fewer locations at that time than buckets of reachable nodes
+            candidates = (
+                (reachable.get(nodes[other][candidate]), other, candidate)
+                for offset in (-1, 0, 1)
+                for other, candidate in periods.get(cell + offset, ()))
+        else:
+            candidates = (
+                (length, other, candidate)
+                for node, length in reachable.items()
+                for offset in (-1, 0, 1)
+                for other, candidate in buckets.get((node, cell + offset),
+                                                    ()))
+        for length, other, candidate in candidates:
+            if length is None or other == trajectory or \
+                    states[other][candidate] != unswapped:
+                continue
+            if abs(timestamps[other][candidate] - timestamp) > \
+                    time_threshold:
+                continue
+            if other not in nearest or length < nearest[other][0]:
+                nearest[other] = (length, candidate)
+
+        if len(nearest) < partners:
+            states[trajectory][position] = removed
+            continue
+
+        members = [(trajectory, position)] + [
+            (other, candidate) for _, other, candidate in sorted(
+                (length, other, candidate)
+                for other, (length, candidate) in nearest.items()
+            )[:partners]
+        ]
+        other, candidate = generator.choice(members[1:] or members)
+        locations[trajectory][position], locations[other][candidate] = \
+            locations[other][candidate], locations[trajectory][position]
+        states[trajectory][position] = swapped
+        states[other][candidate] = swapped
+
+    return tuple(
+        [TrajectoryPoint(timestamp, location) for timestamp, location, state
+         in zip(timestamps[trajectory], locations[trajectory],
+                states[trajectory]) if state != removed]
+        for trajectory in range(len(trajectories))
+    )